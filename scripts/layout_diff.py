@@ -4,18 +4,51 @@ import json
 import math
 import re
 import sys
-import xml.etree.ElementTree as ET
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    from lxml import etree as ET
+except ImportError:  # pragma: no cover
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+else:
+    HAVE_LXML = True
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 PATH_NUM_RE = re.compile(r"[-+]?(?:\d*\.\d+|\d+)(?:[eE][-+]?\d+)?")
 STATE_START_RE = re.compile(r".*_start-(\d+)$")
 STATE_END_RE = re.compile(r".*_end-(\d+)$")
-MMD_START_RE = re.compile(r"^__start_(\d+)__$")
-MMD_END_RE = re.compile(r"^__end_(\d+)__$")
-
-
+MMD_SPECIAL_RE = re.compile(r"^__(start|end)_(\d+)__$")
+TRANSLATE_RE = re.compile(r"translate\(([^,\s]+)[,\s]+([^\)]+)\)")
+NON_KEY_RE = re.compile(r"[^a-z0-9]+")
+SVG_NS = '{http://www.w3.org/2000/svg}'
+SVG_NS_LEN = len(SVG_NS)
+SVG_DEFS = SVG_NS + 'defs'
+# ASCII translation table for normalize_key: keep digits, fold uppercase to
+# lowercase, drop everything else.
+KEY_TABLE = {c: None for c in range(128)}
+KEY_TABLE.update({c: c for c in range(ord('0'), ord('9') + 1)})
+KEY_TABLE.update({c: c for c in range(ord('a'), ord('z') + 1)})
+KEY_TABLE.update({c: c + 32 for c in range(ord('A'), ord('Z') + 1)})
+# ASCII translation table for parse_path_numbers: keep characters that can
+# appear in a number, turn commands, commas and everything else into spaces.
+PATH_NUM_TABLE = {c: ' ' for c in range(128) if chr(c) not in '0123456789.eE+-'}
+
+
+@lru_cache(maxsize=256)
 def strip_ns(tag: str) -> str:
-    if '}' in tag:
+    # The set of distinct tags in a document is tiny, so results are cached.
+    # Nearly every tag lives in the SVG namespace, so slice that prefix off
+    # directly and only fall back to splitting for foreign (e.g. XHTML) tags.
+    if tag.startswith(SVG_NS):
+        return tag[SVG_NS_LEN:]
+    if tag[:1] == '{':
         return tag.split('}', 1)[1]
     return tag
 
@@ -23,22 +56,21 @@ def strip_ns(tag: str) -> str:
 def parse_transform(transform: str):
     if not transform:
         return 0.0, 0.0
-    m = re.search(r"translate\(([^,\s]+)[,\s]+([^\)]+)\)", transform)
+    # Fast path for the plain "translate(x, y)" Mermaid emits; anything the
+    # split cannot mirror exactly goes through the regex.
+    if transform.startswith('translate('):
+        end = transform.find(')')
+        inner = transform[10:end]
+        if end > 10 and not inner[0].isspace() and inner[0] != ',':
+            parts = inner.replace(',', ' ').split()
+            if len(parts) == 2:
+                return float(parts[0]), float(parts[1])
+    m = TRANSLATE_RE.search(transform)
     if not m:
         return 0.0, 0.0
     return float(m.group(1)), float(m.group(2))
 
 
-def parse_points(points: str):
-    pts = []
-    for part in points.replace(',', ' ').split():
-        try:
-            pts.append(float(part))
-        except ValueError:
-            continue
-    return list(zip(pts[0::2], pts[1::2]))
-
-
 def merge_bbox(bbox, other):
     if other is None:
         return bbox
@@ -49,87 +81,123 @@ def merge_bbox(bbox, other):
     return (min(x1, ox1), min(y1, oy1), max(x2, ox2), max(y2, oy2))
 
 
+def coords_bbox(vals, tx, ty):
+    # vals is a flat x, y, x, y, ... list. Translating after the reduction
+    # gives the same result as translating every point because float addition
+    # is monotonic.
+    if len(vals) < 2:
+        return None
+    xs = vals[0::2]
+    ys = vals[1::2]
+    return (min(xs) + tx, min(ys) + ty, max(xs) + tx, max(ys) + ty)
+
+
+def rect_bbox(node, tx, ty):
+    try:
+        x = float(node.attrib.get('x', '0')) + tx
+        y = float(node.attrib.get('y', '0')) + ty
+        w = float(node.attrib.get('width', '0'))
+        h = float(node.attrib.get('height', '0'))
+    except ValueError:
+        return None
+    if w > 0 and h > 0:
+        return (x, y, x + w, y + h)
+    return None
+
+
+def polygon_bbox(node, tx, ty):
+    vals = []
+    for part in node.attrib.get('points', '').replace(',', ' ').split():
+        try:
+            vals.append(float(part))
+        except ValueError:
+            continue
+    if len(vals) % 2:
+        # Points come in pairs; drop a trailing unpaired coordinate.
+        vals.pop()
+    return coords_bbox(vals, tx, ty)
+
+
+def circle_bbox(node, tx, ty):
+    try:
+        cx = float(node.attrib.get('cx', '0')) + tx
+        cy = float(node.attrib.get('cy', '0')) + ty
+        r = float(node.attrib.get('r', '0'))
+    except ValueError:
+        return None
+    if r > 0:
+        return (cx - r, cy - r, cx + r, cy + r)
+    return None
+
+
+def ellipse_bbox(node, tx, ty):
+    try:
+        cx = float(node.attrib.get('cx', '0')) + tx
+        cy = float(node.attrib.get('cy', '0')) + ty
+        rx = float(node.attrib.get('rx', '0'))
+        ry = float(node.attrib.get('ry', '0'))
+    except ValueError:
+        return None
+    if rx > 0 and ry > 0:
+        return (cx - rx, cy - ry, cx + rx, cy + ry)
+    return None
+
+
+def parse_path_numbers(d: str):
+    # Fast path: blank out command letters and separators and split. Numbers
+    # that run together ("1-2", ".5.5") fail to parse and fall back to the
+    # regex scan, whose matches are always valid float syntax.
+    if d.isascii():
+        try:
+            return list(map(float, d.translate(PATH_NUM_TABLE).split()))
+        except ValueError:
+            pass
+    return list(map(float, PATH_NUM_RE.findall(d)))
+
+
+def path_bbox(node, tx, ty):
+    d = node.attrib.get('d', '')
+    if not d:
+        return None
+    return coords_bbox(parse_path_numbers(d), tx, ty)
+
+
+def line_bbox(node, tx, ty):
+    try:
+        x1 = float(node.attrib.get('x1', '0')) + tx
+        y1 = float(node.attrib.get('y1', '0')) + ty
+        x2 = float(node.attrib.get('x2', '0')) + tx
+        y2 = float(node.attrib.get('y2', '0')) + ty
+    except ValueError:
+        return None
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+SHAPE_BBOX_HANDLERS = {
+    'rect': rect_bbox,
+    'polygon': polygon_bbox,
+    'circle': circle_bbox,
+    'ellipse': ellipse_bbox,
+    'path': path_bbox,
+    'line': line_bbox,
+}
+
+
 def bbox_from_shapes(elem, tx, ty):
     bbox = None
-
-    def visit(node, acc_tx, acc_ty):
-        nonlocal bbox
+    stack = [(elem, tx, ty)]
+    while stack:
+        node, acc_tx, acc_ty = stack.pop()
         dx, dy = parse_transform(node.attrib.get('transform', ''))
         cur_tx = acc_tx + dx
         cur_ty = acc_ty + dy
 
         if node is not elem:
-            tag = strip_ns(node.tag)
-            if tag == 'rect':
-                try:
-                    x = float(node.attrib.get('x', '0')) + cur_tx
-                    y = float(node.attrib.get('y', '0')) + cur_ty
-                    w = float(node.attrib.get('width', '0'))
-                    h = float(node.attrib.get('height', '0'))
-                except ValueError:
-                    pass
-                else:
-                    if w > 0 and h > 0:
-                        bbox = merge_bbox(bbox, (x, y, x + w, y + h))
-            elif tag == 'polygon':
-                pts = parse_points(node.attrib.get('points', ''))
-                if pts:
-                    xs = [p[0] + cur_tx for p in pts]
-                    ys = [p[1] + cur_ty for p in pts]
-                    bbox = merge_bbox(bbox, (min(xs), min(ys), max(xs), max(ys)))
-            elif tag == 'circle':
-                try:
-                    cx = float(node.attrib.get('cx', '0')) + cur_tx
-                    cy = float(node.attrib.get('cy', '0')) + cur_ty
-                    r = float(node.attrib.get('r', '0'))
-                except ValueError:
-                    pass
-                else:
-                    if r > 0:
-                        bbox = merge_bbox(bbox, (cx - r, cy - r, cx + r, cy + r))
-            elif tag == 'ellipse':
-                try:
-                    cx = float(node.attrib.get('cx', '0')) + cur_tx
-                    cy = float(node.attrib.get('cy', '0')) + cur_ty
-                    rx = float(node.attrib.get('rx', '0'))
-                    ry = float(node.attrib.get('ry', '0'))
-                except ValueError:
-                    pass
-                else:
-                    if rx > 0 and ry > 0:
-                        bbox = merge_bbox(bbox, (cx - rx, cy - ry, cx + rx, cy + ry))
-            elif tag == 'path':
-                d = node.attrib.get('d', '')
-                if d:
-                    nums = PATH_NUM_RE.findall(d)
-                    if len(nums) >= 2:
-                        vals = []
-                        for n in nums:
-                            try:
-                                vals.append(float(n))
-                            except ValueError:
-                                continue
-                        xs = vals[0::2]
-                        ys = vals[1::2]
-                        if xs and ys:
-                            xs = [x + cur_tx for x in xs]
-                            ys = [y + cur_ty for y in ys]
-                            bbox = merge_bbox(bbox, (min(xs), min(ys), max(xs), max(ys)))
-            elif tag == 'line':
-                try:
-                    x1 = float(node.attrib.get('x1', '0')) + cur_tx
-                    y1 = float(node.attrib.get('y1', '0')) + cur_ty
-                    x2 = float(node.attrib.get('x2', '0')) + cur_tx
-                    y2 = float(node.attrib.get('y2', '0')) + cur_ty
-                except ValueError:
-                    pass
-                else:
-                    bbox = merge_bbox(bbox, (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
-
-        for child in node:
-            visit(child, cur_tx, cur_ty)
-
-    visit(elem, tx, ty)
+            handler = SHAPE_BBOX_HANDLERS.get(strip_ns(node.tag))
+            if handler is not None:
+                bbox = merge_bbox(bbox, handler(node, cur_tx, cur_ty))
+
+        stack.extend((child, cur_tx, cur_ty) for child in node)
     return bbox
 
 
@@ -140,8 +208,12 @@ def normalize_mermaid_id(raw_id: str):
     return raw_id
 
 
+@lru_cache(maxsize=None)
 def normalize_key(value: str):
-    return re.sub(r"[^a-z0-9]+", "", value.lower())
+    if value.isascii():
+        return value.translate(KEY_TABLE)
+    # str.lower() can fold some non-ASCII characters into ASCII ones.
+    return NON_KEY_RE.sub("", value.lower())
 
 
 def extract_label_lines(elem):
@@ -172,13 +244,39 @@ def has_node_shape(elem):
 
 def add_label_mapping(nodes_by_label, label, node):
     nodes_by_label.setdefault(label, node)
-    lower = label.lower()
-    if lower != label:
-        nodes_by_label.setdefault(lower, node)
+
+
+def iter_svg_children(path: Path):
+    """Yield (root, child) for each top-level SVG element as soon as it is parsed.
+
+    The file is streamed through iterparse (lxml's C parser when installed)
+    and each child is detached from the root once the caller is done with it,
+    so only one top-level subtree is held in memory at a time. Elements
+    cannot be cleared any earlier because enclosing groups read their whole
+    subtree for bbox and label scans.
+
+    <defs> only holds markers, filters and gradients, so each defs subtree is
+    dropped as soon as it closes and never reaches the caller.
+    """
+    # lxml keeps comments and processing instructions (whose tag is not a
+    # string) unless told otherwise; ElementTree drops them by default.
+    options = {'remove_comments': True, 'remove_pis': True, 'huge_tree': True} if HAVE_LXML else {}
+    parents = []
+    for event, elem in ET.iterparse(str(path), events=('start', 'end'), **options):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if not parents:
+            break
+        if elem.tag == SVG_DEFS:
+            parents[-1].remove(elem)
+        elif len(parents) == 1:
+            yield parents[0], elem
+            parents[0].remove(elem)
 
 
 def parse_mermaid_svg(path: Path):
-    root = ET.fromstring(path.read_text())
     nodes = {}
     nodes_by_label = {}
     clusters = {}
@@ -186,109 +284,73 @@ def parse_mermaid_svg(path: Path):
     sankey_nodes = []
     sankey_labels = []
 
-    def visit(elem, acc_tx, acc_ty):
-        if strip_ns(elem.tag) == 'defs':
-            return
-        tx, ty = parse_transform(elem.attrib.get('transform', ''))
-        cur_tx = acc_tx + tx
-        cur_ty = acc_ty + ty
-
-        if strip_ns(elem.tag) == 'g':
-            cls = elem.attrib.get('class', '')
-            gid = elem.attrib.get('id')
-            if gid and 'cluster' in cls and 'clusters' not in cls:
-                rect = None
-                for child in elem:
-                    if strip_ns(child.tag) == 'rect':
-                        rect = child
-                        break
-                if rect is not None:
-                    try:
-                        x = float(rect.attrib.get('x', '0')) + cur_tx
-                        y = float(rect.attrib.get('y', '0')) + cur_ty
-                        w = float(rect.attrib.get('width', '0'))
-                        h = float(rect.attrib.get('height', '0'))
-                        clusters[gid] = {
-                            'x': x,
-                            'y': y,
-                            'width': w,
-                            'height': h,
+    def visit(top, top_tx, top_ty):
+        # Iterative pre-order walk; children are pushed in reverse so they
+        # are still visited in document order.
+        stack = [(top, top_tx, top_ty)]
+        while stack:
+            elem, acc_tx, acc_ty = stack.pop()
+            tag = strip_ns(elem.tag)
+            tx, ty = parse_transform(elem.attrib.get('transform', ''))
+            cur_tx = acc_tx + tx
+            cur_ty = acc_ty + ty
+
+            if tag == 'g':
+                cls = elem.attrib.get('class', '')
+                gid = elem.attrib.get('id')
+                if gid and 'cluster' in cls and 'clusters' not in cls:
+                    rect = None
+                    for child in elem:
+                        if strip_ns(child.tag) == 'rect':
+                            rect = child
+                            break
+                    if rect is not None:
+                        try:
+                            x = float(rect.attrib.get('x', '0')) + cur_tx
+                            y = float(rect.attrib.get('y', '0')) + cur_ty
+                            w = float(rect.attrib.get('width', '0'))
+                            h = float(rect.attrib.get('height', '0'))
+                            clusters[gid] = {
+                                'x': x,
+                                'y': y,
+                                'width': w,
+                                'height': h,
+                            }
+                        except ValueError:
+                            pass
+                if 'node-labels' in cls:
+                    for text_el in elem.iter():
+                        if strip_ns(text_el.tag) != 'text':
+                            continue
+                        raw = (text_el.text or '').strip()
+                        if not raw:
+                            continue
+                        lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
+                        if lines:
+                            sankey_labels.append(lines[0])
+
+                handled_node = False
+                if gid and gid.startswith('service-'):
+                    bbox = bbox_from_shapes(elem, acc_tx, acc_ty)
+                    if bbox is not None:
+                        x1, y1, x2, y2 = bbox
+                        node_id = gid[len('service-'):]
+                        node = {
+                            'x': x1,
+                            'y': y1,
+                            'width': x2 - x1,
+                            'height': y2 - y1,
+                            'raw_id': gid,
+                            'class': cls,
                         }
-                    except ValueError:
-                        pass
-            if 'node-labels' in cls:
-                for text_el in elem.iter():
-                    if strip_ns(text_el.tag) != 'text':
-                        continue
-                    raw = (text_el.text or '').strip()
-                    if not raw:
-                        continue
-                    lines = [ln.strip() for ln in raw.splitlines() if ln.strip()]
-                    if lines:
-                        sankey_labels.append(lines[0])
-
-            handled_node = False
-            if gid and gid.startswith('service-'):
-                bbox = bbox_from_shapes(elem, acc_tx, acc_ty)
-                if bbox is not None:
-                    x1, y1, x2, y2 = bbox
-                    node_id = gid[len('service-'):]
-                    node = {
-                        'x': x1,
-                        'y': y1,
-                        'width': x2 - x1,
-                        'height': y2 - y1,
-                        'raw_id': gid,
-                        'class': cls,
-                    }
-                    nodes[node_id] = node
-                    label_lines = extract_label_lines(elem)
-                    label = pick_label_line(label_lines) or node_id
-                    add_label_mapping(nodes_by_label, label, node)
-                    handled_node = True
-
-            is_node_group = 'node' in cls and 'edge' not in cls and 'label' not in cls
-            if is_node_group and not handled_node:
-                bbox = bbox_from_shapes(elem, acc_tx, acc_ty)
-                if bbox is not None:
-                    x1, y1, x2, y2 = bbox
-                    node = {
-                        'x': x1,
-                        'y': y1,
-                        'width': x2 - x1,
-                        'height': y2 - y1,
-                        'raw_id': gid,
-                        'class': cls,
-                    }
-                    if gid and gid.startswith('node-'):
-                        sankey_nodes.append(node)
-                        handled_node = True
-                    else:
-                        if gid:
-                            norm_id = normalize_mermaid_id(gid)
-                            nodes[norm_id] = node
+                        nodes[node_id] = node
                         label_lines = extract_label_lines(elem)
-                        label = pick_label_line(label_lines)
-                        if label:
-                            add_label_mapping(nodes_by_label, label, node)
-                        if gid and (match := STATE_START_RE.match(gid)):
-                            special_nodes.append({
-                                'kind': 'start',
-                                'index': int(match.group(1)),
-                                'node': node,
-                            })
-                        elif gid and (match := STATE_END_RE.match(gid)):
-                            special_nodes.append({
-                                'kind': 'end',
-                                'index': int(match.group(1)),
-                                'node': node,
-                            })
+                        label = pick_label_line(label_lines) or node_id
+                        add_label_mapping(nodes_by_label, label, node)
                         handled_node = True
 
-            if not handled_node and 'edge' not in cls and 'cluster' not in cls:
-                label_lines = extract_label_lines(elem)
-                label = pick_label_line(label_lines)
-                if label and has_node_shape(elem):
+                is_node_group = 'node' in cls and 'edge' not in cls and 'label' not in cls
+                if is_node_group and not handled_node:
                     bbox = bbox_from_shapes(elem, acc_tx, acc_ty)
                     if bbox is not None:
                         x1, y1, x2, y2 = bbox
@@ -300,33 +362,56 @@ def parse_mermaid_svg(path: Path):
                             'raw_id': gid,
                             'class': cls,
                         }
-                        if gid:
-                            norm_id = normalize_mermaid_id(gid)
-                            nodes.setdefault(norm_id, node)
-                        add_label_mapping(nodes_by_label, label, node)
+                        if gid and gid.startswith('node-'):
+                            sankey_nodes.append(node)
+                            handled_node = True
+                        else:
+                            if gid:
+                                norm_id = normalize_mermaid_id(gid)
+                                nodes[norm_id] = node
+                            label_lines = extract_label_lines(elem)
+                            label = pick_label_line(label_lines)
+                            if label:
+                                add_label_mapping(nodes_by_label, label, node)
+                            if gid and (match := STATE_START_RE.match(gid)):
+                                special_nodes.append({
+                                    'kind': 'start',
+                                    'index': int(match.group(1)),
+                                    'node': node,
+                                })
+                            elif gid and (match := STATE_END_RE.match(gid)):
+                                special_nodes.append({
+                                    'kind': 'end',
+                                    'index': int(match.group(1)),
+                                    'node': node,
+                                })
+                            handled_node = True
+
+                if not handled_node and 'edge' not in cls and 'cluster' not in cls:
+                    label_lines = extract_label_lines(elem)
+                    label = pick_label_line(label_lines)
+                    if label and has_node_shape(elem):
+                        bbox = bbox_from_shapes(elem, acc_tx, acc_ty)
+                        if bbox is not None:
+                            x1, y1, x2, y2 = bbox
+                            node = {
+                                'x': x1,
+                                'y': y1,
+                                'width': x2 - x1,
+                                'height': y2 - y1,
+                                'raw_id': gid,
+                                'class': cls,
+                            }
+                            if gid:
+                                norm_id = normalize_mermaid_id(gid)
+                                nodes.setdefault(norm_id, node)
+                            add_label_mapping(nodes_by_label, label, node)
 
-        # Sequence diagrams use actor rects instead of node groups.
-        if strip_ns(elem.tag) == 'rect':
-            cls = elem.attrib.get('class', '')
-            gid = elem.attrib.get('id')
-            if gid and gid.startswith('group-'):
-                try:
-                    x = float(elem.attrib.get('x', '0')) + cur_tx
-                    y = float(elem.attrib.get('y', '0')) + cur_ty
-                    w = float(elem.attrib.get('width', '0'))
-                    h = float(elem.attrib.get('height', '0'))
-                except ValueError:
-                    x = y = w = h = None
-                if w and h and w > 0 and h > 0:
-                    clusters[gid] = {
-                        'x': x,
-                        'y': y,
-                        'width': w,
-                        'height': h,
-                    }
-            if 'actor-top' in cls:
-                name = elem.attrib.get('name')
-                if name and name not in nodes:
+            # Sequence diagrams use actor rects instead of node groups.
+            if tag == 'rect':
+                cls = elem.attrib.get('class', '')
+                gid = elem.attrib.get('id')
+                if gid and gid.startswith('group-'):
                     try:
                         x = float(elem.attrib.get('x', '0')) + cur_tx
                         y = float(elem.attrib.get('y', '0')) + cur_ty
@@ -335,21 +420,41 @@ def parse_mermaid_svg(path: Path):
                     except ValueError:
                         x = y = w = h = None
                     if w and h and w > 0 and h > 0:
-                        node = {
+                        clusters[gid] = {
                             'x': x,
                             'y': y,
                             'width': w,
                             'height': h,
-                            'raw_id': name,
-                            'class': cls,
                         }
-                        nodes[name] = node
-                        add_label_mapping(nodes_by_label, name, node)
-
-        for child in list(elem):
-            visit(child, cur_tx, cur_ty)
-
-    visit(root, 0.0, 0.0)
+                if 'actor-top' in cls:
+                    name = elem.attrib.get('name')
+                    if name and name not in nodes:
+                        try:
+                            x = float(elem.attrib.get('x', '0')) + cur_tx
+                            y = float(elem.attrib.get('y', '0')) + cur_ty
+                            w = float(elem.attrib.get('width', '0'))
+                            h = float(elem.attrib.get('height', '0'))
+                        except ValueError:
+                            x = y = w = h = None
+                        if w and h and w > 0 and h > 0:
+                            node = {
+                                'x': x,
+                                'y': y,
+                                'width': w,
+                                'height': h,
+                                'raw_id': name,
+                                'class': cls,
+                            }
+                            nodes[name] = node
+                            add_label_mapping(nodes_by_label, name, node)
+
+            stack.extend((child, cur_tx, cur_ty) for child in reversed(elem))
+
+    root_tx = root_ty = None
+    for root, elem in iter_svg_children(path):
+        if root_tx is None:
+            root_tx, root_ty = parse_transform(root.attrib.get('transform', ''))
+        visit(elem, root_tx, root_ty)
     if sankey_nodes and sankey_labels and len(sankey_nodes) == len(sankey_labels):
         for label, node in zip(sankey_labels, sankey_nodes):
             nodes[label] = node
@@ -358,7 +463,16 @@ def parse_mermaid_svg(path: Path):
 
 
 def load_mmdr_layout(path: Path):
-    data = json.loads(path.read_text())
+    raw = path.read_bytes()
+    data = None
+    if orjson is not None:
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity literals: read them like layout_score.load_json does.
+            pass
+    if data is None:
+        data = json.loads(raw)
     nodes = {}
     for node in data.get('nodes', []):
         if node.get('hidden'):
@@ -373,22 +487,21 @@ def load_mmdr_layout(path: Path):
 def _build_special_map(mmdr_nodes, mer_specials):
     if not mer_specials:
         return {}
-    mmdr_starts = []
-    mmdr_ends = []
-    for node_id, node in mmdr_nodes.items():
-        if (match := MMD_START_RE.match(node_id)):
-            mmdr_starts.append((int(match.group(1)), node_id, node))
-        elif (match := MMD_END_RE.match(node_id)):
-            mmdr_ends.append((int(match.group(1)), node_id, node))
+    mmdr_specials = {'start': [], 'end': []}
+    for node_id in mmdr_nodes:
+        if (match := MMD_SPECIAL_RE.match(node_id)):
+            mmdr_specials[match.group(1)].append((int(match.group(2)), node_id))
 
-    mer_starts = [s for s in mer_specials if s['kind'] == 'start']
-    mer_ends = [s for s in mer_specials if s['kind'] == 'end']
+    mer_by_kind = {'start': [], 'end': []}
+    for special in mer_specials:
+        mer_by_kind[special['kind']].append(special)
 
     special_map = {}
-    for (_, node_id, _), mer in zip(sorted(mmdr_starts), sorted(mer_starts, key=lambda s: s['index'])):
-        special_map[node_id] = mer['node']
-    for (_, node_id, _), mer in zip(sorted(mmdr_ends), sorted(mer_ends, key=lambda s: s['index'])):
-        special_map[node_id] = mer['node']
+    for kind, mmdr_list in mmdr_specials.items():
+        mmdr_list.sort()
+        mer_list = sorted(mer_by_kind[kind], key=itemgetter('index'))
+        for (_, node_id), mer in zip(mmdr_list, mer_list):
+            special_map[node_id] = mer['node']
     return special_map
 
 
@@ -417,12 +530,13 @@ def match_by_normalized_label(node_id, normalized_labels):
     return None
 
 
-def match_by_label_lines(label_lines, mer_labels, normalized_labels):
+def match_by_label_lines(label_lines, find_label, normalized_labels):
     if not label_lines:
         return None
     for label in label_lines:
-        if label in mer_labels:
-            return mer_labels[label]
+        mer = find_label(label)
+        if mer is not None:
+            return mer
     for label in label_lines:
         mer = match_by_normalized_label(label, normalized_labels)
         if mer is not None:
@@ -440,17 +554,32 @@ def compute_diffs(mmdr_nodes, mer_nodes, mer_labels, mer_specials):
         if not norm:
             continue
         normalized_labels.setdefault(norm, []).append(mer_node)
+
+    # Case-insensitive fallback index, only built once an exact lookup misses.
+    lower_labels = None
+
+    def find_label(label):
+        nonlocal lower_labels
+        mer = mer_labels.get(label)
+        if mer is None:
+            if lower_labels is None:
+                lower_labels = {}
+                for mer_label, mer_node in mer_labels.items():
+                    lower_labels.setdefault(mer_label.lower(), mer_node)
+            mer = lower_labels.get(label)
+        return mer
+
     for node_id, node in mmdr_nodes.items():
         if node_id in special_map:
             mer = special_map[node_id]
         elif node_id in mer_nodes:
             mer = mer_nodes[node_id]
-        elif node_id in mer_labels:
-            mer = mer_labels[node_id]
+        elif (mer := find_label(node_id)) is not None:
+            pass
         else:
             mer = match_by_normalized_label(node_id, normalized_labels)
             if mer is None:
-                mer = match_by_label_lines(node.get('label_lines'), mer_labels, normalized_labels)
+                mer = match_by_label_lines(node.get('label_lines'), find_label, normalized_labels)
             if mer is None:
                 missing.append(node_id)
                 continue
@@ -467,11 +596,30 @@ def compute_diffs(mmdr_nodes, mer_nodes, mer_labels, mer_specials):
             'dy': dy,
             'distance': dist,
         })
+    # The summary totals are summed in this largest-first order, so the sort
+    # is part of the report's float output, not just of top_nodes.
     diffs.sort(key=lambda d: d['distance'], reverse=True)
     return diffs, missing
 
 
-def summarize_diffs(diffs):
+def accumulate_diffs(diffs):
+    """Return (sum |dx|, sum |dy|, sum distance, max distance, sum dx, sum dy) in one pass."""
+    sum_abs_dx = sum_abs_dy = sum_dist = max_dist = sum_dx = sum_dy = 0.0
+    for d in diffs:
+        dx = d['dx']
+        dy = d['dy']
+        dist = d['distance']
+        sum_abs_dx += abs(dx)
+        sum_abs_dy += abs(dy)
+        sum_dist += dist
+        if dist > max_dist:
+            max_dist = dist
+        sum_dx += dx
+        sum_dy += dy
+    return sum_abs_dx, sum_abs_dy, sum_dist, max_dist, sum_dx, sum_dy
+
+
+def summarize_diffs(diffs, totals=None):
     if not diffs:
         return {
             'count': 0,
@@ -480,25 +628,27 @@ def summarize_diffs(diffs):
             'mean_distance': 0.0,
             'max_distance': 0.0,
         }
-    mean_abs_dx = sum(abs(d['dx']) for d in diffs) / len(diffs)
-    mean_abs_dy = sum(abs(d['dy']) for d in diffs) / len(diffs)
-    mean_dist = sum(d['distance'] for d in diffs) / len(diffs)
-    max_dist = max(d['distance'] for d in diffs)
+    if totals is None:
+        totals = accumulate_diffs(diffs)
+    sum_abs_dx, sum_abs_dy, sum_dist, max_dist, _, _ = totals
+    count = len(diffs)
     return {
-        'count': len(diffs),
-        'mean_abs_dx': mean_abs_dx,
-        'mean_abs_dy': mean_abs_dy,
-        'mean_distance': mean_dist,
+        'count': count,
+        'mean_abs_dx': sum_abs_dx / count,
+        'mean_abs_dy': sum_abs_dy / count,
+        'mean_distance': sum_dist / count,
         'max_distance': max_dist,
     }
 
 
-def align_diffs(diffs):
+def align_diffs(diffs, totals=None):
     if not diffs:
         return 0.0, 0.0, summarize_diffs([]), []
 
-    mean_dx = sum(d['dx'] for d in diffs) / len(diffs)
-    mean_dy = sum(d['dy'] for d in diffs) / len(diffs)
+    if totals is None:
+        totals = accumulate_diffs(diffs)
+    mean_dx = totals[4] / len(diffs)
+    mean_dy = totals[5] / len(diffs)
 
     aligned = []
     for d in diffs:
@@ -514,6 +664,10 @@ def align_diffs(diffs):
     return mean_dx, mean_dy, summarize_diffs(aligned), aligned[:10]
 
 
+def dump_report(report) -> str:
+    return json.dumps(report, indent=2)
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--mmdr-layout', required=True)
@@ -525,8 +679,9 @@ def main():
     mer_nodes, mer_labels, mer_clusters, mer_specials = parse_mermaid_svg(Path(args.mermaid_svg))
 
     diffs, missing = compute_diffs(mmdr_nodes, mer_nodes, mer_labels, mer_specials)
-    summary = summarize_diffs(diffs)
-    mean_dx, mean_dy, aligned_summary, aligned_top = align_diffs(diffs)
+    totals = accumulate_diffs(diffs)
+    summary = summarize_diffs(diffs, totals)
+    mean_dx, mean_dy, aligned_summary, aligned_top = align_diffs(diffs, totals)
     report = {
         'summary': summary,
         'alignment': {
@@ -539,9 +694,10 @@ def main():
         'aligned_top_nodes': aligned_top,
     }
 
+    text = dump_report(report)
     if args.output:
-        Path(args.output).write_text(json.dumps(report, indent=2))
-    print(json.dumps(report, indent=2))
+        Path(args.output).write_text(text)
+    print(text)
     return 0
 
 
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import argparse
+import concurrent.futures
+import hashlib
 import json
 import math
+import os
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+SCORE_CACHE_SCHEMA_VERSION = 1
 
 WEIGHTS = {
     # Crossing/overlap terms are still dominant readability drivers.
@@ -44,8 +54,31 @@ WEIGHTS = {
 }
 
 
+def load_json(path: Path):
+    data = path.read_bytes()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects the NaN/Infinity literals json.dumps writes for
+            # non-finite metrics; let the json module read those files.
+            pass
+    return json.loads(data)
+
+
+def dump_json(value) -> str:
+    # Written artifacts always come from the json module: orjson spells
+    # exponents, non-finite floats and non-ASCII text differently, and output
+    # bytes should not depend on which optional packages are installed.
+    return json.dumps(value, indent=2)
+
+
+def write_json(path: Path, value):
+    path.write_text(dump_json(value))
+
+
 def load_layout(path: Path):
-    data = json.loads(path.read_text())
+    data = load_json(path)
     nodes = {}
     for node in data.get("nodes", []):
         if node.get("hidden"):
@@ -83,10 +116,6 @@ def segments_from_points(points):
     return list(zip(points, points[1:]))
 
 
-def orient(a, b, c):
-    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
-
-
 def on_segment(a, b, c, eps):
     return (
         min(a[0], b[0]) - eps <= c[0] <= max(a[0], b[0]) + eps
@@ -94,41 +123,65 @@ def on_segment(a, b, c, eps):
     )
 
 
-def segments_intersect(a, b, c, d, eps=1e-6):
-    o1 = orient(a, b, c)
-    o2 = orient(a, b, d)
-    o3 = orient(c, d, a)
-    o4 = orient(c, d, b)
+def segments_intersect_xy(ax, ay, bx, by, cx, cy, dx, dy, eps=1e-6):
+    """Whether segments ab and cd cross or touch, within eps, on plain coordinates."""
+    o1 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    o2 = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+    o3 = (dx - cx) * (ay - cy) - (dy - cy) * (ax - cx)
+    o4 = (dx - cx) * (by - cy) - (dy - cy) * (bx - cx)
 
-    if abs(o1) < eps and abs(o2) < eps and abs(o3) < eps and abs(o4) < eps:
-        return False
+    # The sign products decide the common case; the near-zero (collinear or
+    # touching) cases are only examined when they fail. Chained comparisons
+    # give the same result as abs(o) < eps without the calls.
     if o1 * o2 < 0 and o3 * o4 < 0:
+        return not (-eps < o1 < eps and -eps < o2 < eps and -eps < o3 < eps and -eps < o4 < eps)
+    near1 = -eps < o1 < eps
+    near2 = -eps < o2 < eps
+    near3 = -eps < o3 < eps
+    near4 = -eps < o4 < eps
+    if near1 and near2 and near3 and near4:
+        return False
+    if near1 and (
+        min(ax, bx) - eps <= cx <= max(ax, bx) + eps and min(ay, by) - eps <= cy <= max(ay, by) + eps
+    ):
         return True
-    if abs(o1) < eps and on_segment(a, b, c, eps):
-        return True
-    if abs(o2) < eps and on_segment(a, b, d, eps):
+    if near2 and (
+        min(ax, bx) - eps <= dx <= max(ax, bx) + eps and min(ay, by) - eps <= dy <= max(ay, by) + eps
+    ):
         return True
-    if abs(o3) < eps and on_segment(c, d, a, eps):
+    if near3 and (
+        min(cx, dx) - eps <= ax <= max(cx, dx) + eps and min(cy, dy) - eps <= ay <= max(cy, dy) + eps
+    ):
         return True
-    if abs(o4) < eps and on_segment(c, d, b, eps):
+    if near4 and (
+        min(cx, dx) - eps <= bx <= max(cx, dx) + eps and min(cy, dy) - eps <= by <= max(cy, dy) + eps
+    ):
         return True
     return False
 
 
 def collinear_overlap_length(a, b, c, d, eps=1e-6):
-    if abs(orient(a, b, c)) > eps or abs(orient(a, b, d)) > eps:
-        return 0.0
+    # The orientations of c and d against ab are computed inline; the endpoint
+    # deltas are shared with the projections below. The comparisons are written so a
+    # NaN orientation falls through, exactly like abs(o) > eps.
     dx = b[0] - a[0]
     dy = b[1] - a[1]
+    cdx = c[0] - a[0]
+    cdy = c[1] - a[1]
+    o = dx * cdy - dy * cdx
+    if o > eps or o < -eps:
+        return 0.0
+    ddx = d[0] - a[0]
+    ddy = d[1] - a[1]
+    o = dx * ddy - dy * ddx
+    if o > eps or o < -eps:
+        return 0.0
     seg_len_sq = dx * dx + dy * dy
     if seg_len_sq < eps:
         return 0.0
 
-    def proj(p):
-        return ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / seg_len_sq
-
-    t1 = proj(c)
-    t2 = proj(d)
+    t1 = (cdx * dx + cdy * dy) / seg_len_sq
+    t2 = (ddx * dx + ddy * dy) / seg_len_sq
     tmin = min(t1, t2)
     tmax = max(t1, t2)
     overlap = max(0.0, min(1.0, tmax) - max(0.0, tmin))
@@ -138,48 +191,54 @@ def collinear_overlap_length(a, b, c, d, eps=1e-6):
 def bend_count(points, eps=1e-6):
     if len(points) < 3:
         return 0
+    # Each segment delta is computed once and serves as v2 of one corner and
+    # v1 of the next.
+    deltas = [(b[0] - a[0], b[1] - a[1]) for a, b in zip(points, points[1:])]
     bends = 0
-    for i in range(1, len(points) - 1):
-        a = points[i - 1]
-        b = points[i]
-        c = points[i + 1]
-        v1 = (b[0] - a[0], b[1] - a[1])
-        v2 = (c[0] - b[0], c[1] - b[1])
-        if abs(v1[0]) < eps and abs(v1[1]) < eps:
+    for (v1x, v1y), (v2x, v2y) in zip(deltas, deltas[1:]):
+        if -eps < v1x < eps and -eps < v1y < eps:
             continue
-        if abs(v2[0]) < eps and abs(v2[1]) < eps:
+        if -eps < v2x < eps and -eps < v2y < eps:
             continue
-        cross = v1[0] * v2[1] - v1[1] * v2[0]
-        if abs(cross) > eps:
+        cross = v1x * v2y - v1y * v2x
+        if cross > eps or cross < -eps:
             bends += 1
     return bends
 
 
-def infer_side(node, point, tol=1.0):
+def nearest_side(node, point):
+    """Return (side, distance) of the node boundary side closest to point.
+
+    Ties resolve in left, right, top, bottom order.
+    """
     x = node["x"]
     y = node["y"]
-    w = node["width"]
-    h = node["height"]
     px, py = point
-    sides = {
-        "left": abs(px - x),
-        "right": abs(px - (x + w)),
-        "top": abs(py - y),
-        "bottom": abs(py - (y + h)),
-    }
-    side, delta = min(sides.items(), key=lambda item: item[1])
-    if delta <= tol:
-        return side
-    return "unknown"
+    side = "left"
+    delta = abs(px - x)
+    d = abs(px - (x + node["width"]))
+    if d < delta:
+        side, delta = "right", d
+    d = abs(py - y)
+    if d < delta:
+        side, delta = "top", d
+    d = abs(py - (y + node["height"]))
+    if d < delta:
+        side, delta = "bottom", d
+    return side, delta
+
+
+PORT_SIDE_INDEX = {"left": 0, "right": 1, "top": 2, "bottom": 3}
+OPPOSITE_SIDE = {
+    "left": "right",
+    "right": "left",
+    "top": "bottom",
+    "bottom": "top",
+}
 
 
 def opposite_side(side):
-    return {
-        "left": "right",
-        "right": "left",
-        "top": "bottom",
-        "bottom": "top",
-    }.get(side)
+    return OPPOSITE_SIDE.get(side)
 
 
 def dominant_axis_side(dx, dy, eps=1e-9):
@@ -383,72 +442,226 @@ def rect_contains(a, b, eps=1e-6, min_margin=1.0):
     )
 
 
-def node_overlap_metrics(nodes, allow_containment=False):
-    ids = list(nodes.keys())
+def node_boxes(node_list):
+    """(x1, y1, x2, y2) corners per node, computed once instead of once per pair."""
+    return [
+        (node["x"], node["y"], node["x"] + node["width"], node["y"] + node["height"])
+        for node in node_list
+    ]
+
+
+def node_overlap_metrics(nodes, allow_containment=False, boxes=None):
+    node_list = list(nodes.values())
+    if boxes is None:
+        boxes = node_boxes(node_list)
+    # Only pairs whose bboxes touch can overlap; candidates come back in
+    # (i, j) order so the overlap area sums in the same order as a full scan.
+    candidates = sweep_box_pairs(boxes)
     overlap_count = 0
     overlap_area = 0.0
-    for i in range(len(ids)):
-        a = nodes[ids[i]]
-        ax1, ay1 = a["x"], a["y"]
-        ax2, ay2 = ax1 + a["width"], ay1 + a["height"]
-        for j in range(i + 1, len(ids)):
-            b = nodes[ids[j]]
-            bx1, by1 = b["x"], b["y"]
-            bx2, by2 = bx1 + b["width"], by1 + b["height"]
+    for i, (ax1, ay1, ax2, ay2) in enumerate(boxes):
+        for j in candidates[i]:
+            bx1, by1, bx2, by2 = boxes[j]
             ix1 = max(ax1, bx1)
             iy1 = max(ay1, by1)
             ix2 = min(ax2, bx2)
             iy2 = min(ay2, by2)
             if ix2 > ix1 and iy2 > iy1:
-                if allow_containment and (rect_contains(a, b) or rect_contains(b, a)):
+                if allow_containment and (
+                    rect_contains(node_list[i], node_list[j]) or rect_contains(node_list[j], node_list[i])
+                ):
                     continue
                 overlap_count += 1
                 overlap_area += (ix2 - ix1) * (iy2 - iy1)
     return overlap_count, overlap_area
 
 
-def segment_intersects_rect(a, b, rect, eps=1e-6):
+def node_spacing_violations(boxes, spacing_target):
+    # A violation needs both gaps below spacing_target, so only pairs whose
+    # bboxes touch once widened by the target are visited, in (i, j) order.
+    candidates = sweep_box_pairs(boxes, pad=spacing_target)
+    hypot = math.hypot
+    violation_count = 0
+    violation_severity = 0.0
+    for i, (ax1, ay1, ax2, ay2) in enumerate(boxes):
+        for j in candidates[i]:
+            bx1, by1, bx2, by2 = boxes[j]
+            if ax1 < bx2 and bx1 < ax2 and ay1 < by2 and by1 < ay2:
+                # Overlap is handled by node overlap metrics.
+                continue
+            gap_x = max(0.0, max(bx1 - ax2, ax1 - bx2))
+            gap_y = max(0.0, max(by1 - ay2, ay1 - by2))
+            gap = hypot(gap_x, gap_y)
+            if gap < spacing_target:
+                violation_count += 1
+                violation_severity += (spacing_target - gap) / max(spacing_target, 1e-6)
+    return violation_count, violation_severity
+
+
+def segment_intersects_rect(a, b, rect, eps=1e-6, bounds=None):
+    """bounds, when given, is the segment's precomputed (min_x, min_y, max_x, max_y)."""
     x, y, w, h = rect
     x1, y1 = a
     x2, y2 = b
-    min_x = min(x1, x2)
-    max_x = max(x1, x2)
-    min_y = min(y1, y2)
-    max_y = max(y1, y2)
+    if bounds is None:
+        bounds = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+    min_x, min_y, max_x, max_y = bounds
     if max_x < x - eps or min_x > x + w + eps or max_y < y - eps or min_y > y + h + eps:
         return False
     if x - eps <= x1 <= x + w + eps and y - eps <= y1 <= y + h + eps:
         return True
     if x - eps <= x2 <= x + w + eps and y - eps <= y2 <= y + h + eps:
         return True
-    corners = [
-        (x, y),
-        (x + w, y),
-        (x + w, y + h),
-        (x, y + h),
-    ]
-    edges = [
-        (corners[0], corners[1]),
-        (corners[1], corners[2]),
-        (corners[2], corners[3]),
-        (corners[3], corners[0]),
-    ]
-    for c, d in edges:
-        if segments_intersect(a, b, c, d, eps=eps):
-            return True
-    return False
+    # Test the four rect sides (clockwise from the top-left corner).
+    right = x + w
+    bottom = y + h
+    return (
+        segments_intersect_xy(x1, y1, x2, y2, x, y, right, y, eps)
+        or segments_intersect_xy(x1, y1, x2, y2, right, y, right, bottom, eps)
+        or segments_intersect_xy(x1, y1, x2, y2, right, bottom, x, bottom, eps)
+        or segments_intersect_xy(x1, y1, x2, y2, x, bottom, x, y, eps)
+    )
+
+
+def build_rect_grid(rects, pad=1e-6):
+    """Bucket (x, y, w, h) rects into a uniform grid for bbox candidate queries.
+
+    Returns (cell_size, buckets); bucket key None holds rects that are too
+    large or not finite to bucket and are always returned as candidates.
+    """
+    spans = [max(abs(w), abs(h)) for _, _, w, h in rects]
+    spans = [span for span in spans if math.isfinite(span)]
+    cell_size = max(sum(spans) / len(spans), 1.0) if spans else 1.0
+    buckets = {None: []}
+    for idx, (x, y, w, h) in enumerate(rects):
+        try:
+            cx1 = math.floor((min(x, x + w) - pad) / cell_size)
+            cx2 = math.floor((max(x, x + w) + pad) / cell_size)
+            cy1 = math.floor((min(y, y + h) - pad) / cell_size)
+            cy2 = math.floor((max(y, y + h) + pad) / cell_size)
+        except (OverflowError, ValueError):
+            buckets[None].append(idx)
+            continue
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > 64:
+            buckets[None].append(idx)
+            continue
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                buckets.setdefault((cx, cy), []).append(idx)
+    return cell_size, buckets
+
+
+def query_rect_grid(grid, count, x1, y1, x2, y2):
+    """Ascending indices of grid rects that may overlap the box (x1, y1)-(x2, y2)."""
+    cell_size, buckets = grid
+    try:
+        cx1 = math.floor(x1 / cell_size)
+        cx2 = math.floor(x2 / cell_size)
+        cy1 = math.floor(y1 / cell_size)
+        cy2 = math.floor(y2 / cell_size)
+    except (OverflowError, ValueError):
+        return range(count)
+    if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) >= count:
+        return range(count)
+    hits = set(buckets[None])
+    for cx in range(cx1, cx2 + 1):
+        for cy in range(cy1, cy2 + 1):
+            bucket = buckets.get((cx, cy))
+            if bucket:
+                hits.update(bucket)
+    return sorted(hits)
+
+
+def endpoint_cells(points, eps=1e-6):
+    """Grid cells (of size 2 * eps) holding the finite points.
+
+    Two points less than eps apart always land in the same or adjacent cells.
+    """
+    size = 2.0 * eps
+    cells = set()
+    for x, y in points:
+        try:
+            cells.add((math.floor(x / size), math.floor(y / size)))
+        except (OverflowError, ValueError):
+            continue
+    return cells
+
+
+def neighbor_cells(cells):
+    return {(cx + dx, cy + dy) for cx, cy in cells for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+
 
+def sweep_box_pairs(boxes, pad=0.0):
+    """For each box i, the ascending indices j > i whose bbox overlaps it.
 
-def crossing_angle_degrees(a, b, c, d):
-    v1 = (b[0] - a[0], b[1] - a[1])
-    v2 = (d[0] - c[0], d[1] - c[1])
-    l1 = math.hypot(v1[0], v1[1])
-    l2 = math.hypot(v2[0], v2[1])
+    Boxes are (x1, y1, x2, y2) with corners in either order, widened by pad
+    on every side; touching boxes count as overlapping. A sort-and-sweep
+    over x keeps the boxes whose x-range is still open and reports those
+    whose y-range overlaps too. Boxes with a non-finite coordinate cannot
+    be ordered and are paired with every other box.
+    """
+    spans = []
+    unordered = []
+    for idx, (x1, y1, x2, y2) in enumerate(boxes):
+        if not (math.isfinite(x1) and math.isfinite(y1) and math.isfinite(x2) and math.isfinite(y2)):
+            unordered.append(idx)
+            continue
+        if x1 > x2:
+            x1, x2 = x2, x1
+        if y1 > y2:
+            y1, y2 = y2, y1
+        spans.append((x1 - pad, x2 + pad, y1 - pad, y2 + pad, idx))
+    spans.sort()
+    candidates = [[] for _ in boxes]
+    active = []
+    for lo, hi, ylo, yhi, idx in spans:
+        active = [item for item in active if item[0] >= lo]
+        for _, other_ylo, other_yhi, other in active:
+            if other_ylo <= yhi and ylo <= other_yhi:
+                if other < idx:
+                    candidates[other].append(idx)
+                else:
+                    candidates[idx].append(other)
+        active.append((hi, ylo, yhi, idx))
+    unordered_set = set(unordered)
+    for idx in unordered:
+        for other in range(len(boxes)):
+            if other == idx or (other in unordered_set and other < idx):
+                continue
+            candidates[min(idx, other)].append(max(idx, other))
+    for pairs in candidates:
+        pairs.sort()
+    return candidates
+
+
+def padded_segment_box(a, b, pad=1e-2):
+    """(x1, y1, x2, y2) bbox of segment ab widened by pad, or None if not finite."""
+    ax, ay = a
+    bx, by = b
+    if not (math.isfinite(ax) and math.isfinite(ay) and math.isfinite(bx) and math.isfinite(by)):
+        return None
+    return (min(ax, bx) - pad, min(ay, by) - pad, max(ax, bx) + pad, max(ay, by) + pad)
+
+
+def sweep_segment_pairs(flat_segments, pad=1e-2):
+    """For each segment i, the ascending indices j > i whose bbox overlaps it.
+
+    Segment bboxes are widened by pad. Pairs further apart than that can
+    neither cross nor overlap: a collinear match needs both endpoints within
+    eps / |ab| <= sqrt(eps) = 1e-3 of the other segment's line
+    (collinear_overlap_length ignores segments shorter than that).
+    """
+    return sweep_box_pairs([segment[3:] for segment in flat_segments], pad=pad)
+
+
+def acute_angle_degrees(v1x, v1y, l1, v2x, v2y, l2):
+    """Acute angle between two vectors given with their precomputed lengths."""
     if l1 < 1e-9 or l2 < 1e-9:
         return 90.0
     # Use acute crossing angle as readability proxy.
-    cosv = abs((v1[0] * v2[0] + v1[1] * v2[1]) / (l1 * l2))
-    cosv = clamp(cosv, -1.0, 1.0)
+    # abs() is never below -1, so clamp(cosv, -1.0, 1.0) reduces to min()
+    # (which, like clamp, also maps NaN to 1.0).
+    cosv = min(1.0, abs((v1x * v2x + v1y * v2y) / (l1 * l2)))
     return math.degrees(math.acos(cosv))
 
 
@@ -464,82 +677,80 @@ def direction_from_points(a, b):
 def min_angular_resolution_penalty(node_dirs):
     if len(node_dirs) < 2:
         return None
-    min_angle = 180.0
-    for i in range(len(node_dirs)):
-        for j in range(i + 1, len(node_dirs)):
-            a = node_dirs[i]
-            b = node_dirs[j]
-            dot = clamp(a[0] * b[0] + a[1] * b[1], -1.0, 1.0)
-            angle = math.degrees(math.acos(dot))
-            if angle < min_angle:
-                min_angle = angle
+    # acos is decreasing, so the smallest pairwise angle comes from the
+    # largest dot product; min(1.0, dot) also maps NaN dots to angle 0.
+    max_dot = max(
+        min(1.0, a[0] * b[0] + a[1] * b[1])
+        for i, a in enumerate(node_dirs)
+        for b in node_dirs[i + 1 :]
+    )
+    min_angle = min(180.0, math.degrees(math.acos(max(-1.0, max_dot))))
     penalty = max(0.0, (35.0 - min_angle) / 35.0)
     return min_angle, penalty
 
 
-def compute_content_bounds(nodes, edges):
-    min_x = float("inf")
-    min_y = float("inf")
-    max_x = float("-inf")
-    max_y = float("-inf")
-    seen = False
-
-    for node in nodes.values():
-        x1 = node["x"]
-        y1 = node["y"]
-        x2 = x1 + node["width"]
-        y2 = y1 + node["height"]
-        min_x = min(min_x, x1)
-        min_y = min(min_y, y1)
-        max_x = max(max_x, x2)
-        max_y = max(max_y, y2)
-        seen = True
-
-    for edge in edges:
-        for point in edge.get("points", []):
-            px, py = point
-            min_x = min(min_x, px)
-            min_y = min(min_y, py)
-            max_x = max(max_x, px)
-            max_y = max(max_y, py)
-            seen = True
-
-    if not seen:
+def compute_content_bounds(nodes, edges, boxes=None):
+    if boxes is None:
+        boxes = node_boxes(nodes.values())
+    points = [(px, py) for edge in edges for px, py in edge.get("points", [])]
+    if not boxes and not points:
         return 0.0, 0.0, 0.0, 0.0
-    return min_x, min_y, max_x, max_y
+    x1s, y1s, x2s, y2s = zip(*boxes) if boxes else ((), (), (), ())
+    pxs, pys = zip(*points) if points else ((), ())
+    # Each reduction starts from +/-inf and runs nodes then edge points, so
+    # it keeps exactly what a running min/max update did (NaNs included).
+    return (
+        min((math.inf, *x1s, *pxs)),
+        min((math.inf, *y1s, *pys)),
+        max((-math.inf, *x2s, *pxs)),
+        max((-math.inf, *y2s, *pys)),
+    )
 
 
 def connected_components(nodes, edges):
-    adjacency = {node_id: set() for node_id in nodes}
+    # Weighted union-find over node indices; components come out ordered by
+    # their first node, as a DFS over the nodes in order would yield them.
+    node_ids = list(nodes)
+    index = {node_id: idx for idx, node_id in enumerate(node_ids)}
+    parent = list(range(len(node_ids)))
+    size = [1] * len(node_ids)
+
+    def find(idx):
+        root = idx
+        while parent[root] != root:
+            root = parent[root]
+        while parent[idx] != root:
+            nxt = parent[idx]
+            parent[idx] = root
+            idx = nxt
+        return root
+
     for edge in edges:
-        from_id = edge.get("from")
-        to_id = edge.get("to")
-        if from_id in adjacency and to_id in adjacency:
-            adjacency[from_id].add(to_id)
-            adjacency[to_id].add(from_id)
-
-    comps = []
-    seen = set()
-    for node_id in adjacency:
-        if node_id in seen:
+        a = index.get(edge.get("from"))
+        b = index.get(edge.get("to"))
+        if a is None or b is None:
             continue
-        stack = [node_id]
-        seen.add(node_id)
-        comp = []
-        while stack:
-            cur = stack.pop()
-            comp.append(cur)
-            for nxt in adjacency[cur]:
-                if nxt in seen:
-                    continue
-                seen.add(nxt)
-                stack.append(nxt)
-        comps.append(comp)
-    return comps
+        ra = find(a)
+        rb = find(b)
+        if ra == rb:
+            continue
+        if size[ra] < size[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        size[ra] += size[rb]
+
+    comps = {}
+    for idx, node_id in enumerate(node_ids):
+        comps.setdefault(find(idx), []).append(node_id)
+    return list(comps.values())
 
 
 def compute_metrics(data, nodes, edges):
     kind = str(data.get("kind", "")).strip().lower()
+    # Bound once so the per-segment and per-pair loops below use fast local
+    # lookups instead of global/attribute ones.
+    hypot = math.hypot
+    angle_between = acute_angle_degrees
     flow_axis, flow_sign = layout_direction_axis(data.get("direction", ""))
     total_edge_length = 0.0
     edge_bends = 0
@@ -566,7 +777,9 @@ def compute_metrics(data, nodes, edges):
     flow_monotonic_edge_count = 0
 
     segments = []
+    segment_lengths = []
     edge_points = []
+    edge_segments = []
     edge_path_lengths = []
     edge_node_near_miss_pairs = set()
     node_dirs = {}
@@ -578,7 +791,17 @@ def compute_metrics(data, nodes, edges):
     parallel_edge_overlap_ratios = []
     parallel_edge_separations = []
 
+    # One pass over the edges gathers the per-edge path terms, the port and
+    # endpoint checks and the parallel-edge grouping; port_counts holds four
+    # counters per node, indexed by PORT_SIDE_INDEX.
+    port_counts = {node_id: [0, 0, 0, 0] for node_id in nodes}
+    parallel_groups = {}
     for idx, edge in enumerate(edges):
+        from_id = edge.get("from")
+        to_id = edge.get("to")
+        if from_id is not None and to_id is not None:
+            key = tuple(sorted((str(from_id), str(to_id))))
+            parallel_groups.setdefault(key, []).append(idx)
         points = [tuple(p) for p in edge.get("points", [])]
         edge_points.append(points)
         edge_bends += bend_count(points)
@@ -586,28 +809,35 @@ def compute_metrics(data, nodes, edges):
         edge_forward = 0.0
         edge_backtrack = 0.0
         edge_lateral = 0.0
-        for a, b in segments_from_points(points):
-            seg_len = dist(a, b)
+        point_segments = segments_from_points(points)
+        edge_segments.append(point_segments)
+        for a, b in point_segments:
+            # hypot ignores signs, so this equals dist(a, b); the deltas are
+            # shared with the flow-axis term below.
+            dx = b[0] - a[0]
+            dy = b[1] - a[1]
+            seg_len = hypot(dx, dy)
             path_len += seg_len
             total_edge_length += seg_len
             segments.append((idx, a, b))
+            segment_lengths.append(seg_len)
             if flow_axis:
-                primary_delta = (b[0] - a[0]) if flow_axis == "x" else (b[1] - a[1])
+                primary_delta = dx if flow_axis == "x" else dy
                 signed = primary_delta * flow_sign
                 edge_forward += max(0.0, signed)
                 edge_backtrack += max(0.0, -signed)
                 edge_lateral += max(0.0, seg_len - abs(primary_delta))
         edge_path_lengths.append(path_len)
         if len(points) >= 2:
-            from_id = edge.get("from")
-            to_id = edge.get("to")
+            from_node = nodes.get(from_id)
+            to_node = nodes.get(to_id)
             direct_len = dist(points[0], points[-1])
             if direct_len > 1e-3:
                 edge_detour_sum += path_len / direct_len
                 edge_detour_count += 1
-            if flow_axis and from_id in nodes and to_id in nodes:
-                src_center = node_center(nodes[from_id])
-                dst_center = node_center(nodes[to_id])
+            if flow_axis and from_node is not None and to_node is not None:
+                src_center = node_center(from_node)
+                dst_center = node_center(to_node)
                 desired_primary = (
                     (dst_center[0] - src_center[0]) if flow_axis == "x" else (dst_center[1] - src_center[1])
                 ) * flow_sign
@@ -625,103 +855,206 @@ def compute_metrics(data, nodes, edges):
             if to_id and end_dir is not None:
                 node_dirs.setdefault(to_id, []).append(end_dir)
 
-    for i in range(len(segments)):
-        ei, a1, a2 = segments[i]
+            from_side_eval = "unknown"
+            to_side_eval = "unknown"
+            if from_node is not None:
+                # One nearest-side lookup serves both the port count (tol 1.0)
+                # and the size-scaled evaluation tolerance.
+                side, delta = nearest_side(from_node, points[0])
+                if delta <= 1.0:
+                    port_counts[from_id][PORT_SIDE_INDEX[side]] += 1
+                tol = max(1.0, min(from_node["width"], from_node["height"]) * 0.04)
+                from_side_eval = side if delta <= tol else "unknown"
+                boundary_error = point_rect_boundary_distance(points[0], from_node)
+                endpoint_boundary_error_sum += boundary_error
+                endpoint_boundary_error_count += 1
+                if boundary_error > 1.5:
+                    endpoint_off_boundary_count += 1
+
+                exit_side = dominant_axis_side(
+                    points[1][0] - points[0][0],
+                    points[1][1] - points[0][1],
+                )
+                if from_side_eval != "unknown" and exit_side is not None:
+                    port_direction_comparable += 1
+                    if exit_side != from_side_eval:
+                        port_direction_misalignment_count += 1
+            if to_node is not None:
+                side, delta = nearest_side(to_node, points[-1])
+                if delta <= 1.0:
+                    port_counts[to_id][PORT_SIDE_INDEX[side]] += 1
+                tol = max(1.0, min(to_node["width"], to_node["height"]) * 0.04)
+                to_side_eval = side if delta <= tol else "unknown"
+                boundary_error = point_rect_boundary_distance(points[-1], to_node)
+                endpoint_boundary_error_sum += boundary_error
+                endpoint_boundary_error_count += 1
+                if boundary_error > 1.5:
+                    endpoint_off_boundary_count += 1
+
+                enter_side = dominant_axis_side(
+                    points[-1][0] - points[-2][0],
+                    points[-1][1] - points[-2][1],
+                )
+                expected_enter_side = opposite_side(to_side_eval)
+                if expected_enter_side is not None and enter_side is not None:
+                    port_direction_comparable += 1
+                    if enter_side != expected_enter_side:
+                        port_direction_misalignment_count += 1
+
+            if from_node is not None and to_node is not None:
+                expected_from_side = expected_side_towards(from_node, to_node)
+                if expected_from_side is not None:
+                    port_target_side_comparable += 1
+                    if from_side_eval != expected_from_side:
+                        port_target_side_mismatch_count += 1
+                expected_to_side = expected_side_towards(to_node, from_node)
+                if expected_to_side is not None:
+                    port_target_side_comparable += 1
+                    if to_side_eval != expected_to_side:
+                        port_target_side_mismatch_count += 1
+
+    # Flatten segment endpoints once so the segment pair loop below works on
+    # plain floats; the orientation tests of segments_intersect_xy and
+    # collinear_overlap_length are inlined (same arithmetic, same order) and
+    # the helpers are only called on the rare near-collinear paths.
+    flat_segments = [(ei, a, b, a[0], a[1], b[0], b[1]) for ei, a, b in segments]
+    eps = 1e-6
+    node_ids = list(nodes.keys())
+    node_list = list(nodes.values())
+    # Node geometry is read out of the node dicts once; the node passes below
+    # index these rows instead of looking the fields up per pair.
+    boxes = node_boxes(node_list)
+    node_rects = [(node["x"], node["y"], node["width"], node["height"]) for node in node_list]
+    median_node_span = 0.0
+    if node_ids:
+        spans = []
+        for _, _, w, h in node_rects:
+            spans.append(min(max(w, 0.0), max(h, 0.0)))
+        spans = sorted(spans)
+        median_node_span = spans[len(spans) // 2]
+    spacing_target = clamp(median_node_span * 0.25 if median_node_span > 0.0 else 12.0, 8.0, 24.0)
+    near_miss_pad = max(4.0, spacing_target * 0.5)
+    # Edge-node crossings and near misses share one segment x node pass: a
+    # node the segment does not cross is then tested against its padded rect.
+    # Only nodes whose grid cells overlap the segment's bbox (widened by the
+    # near-miss pad) are visited, since segment_intersects_rect rejects
+    # everything else; candidates come back in node order so the crossing
+    # length sums in the same order.
+    padded_node_rects = [
+        (x - near_miss_pad, y - near_miss_pad, w + 2.0 * near_miss_pad, h + 2.0 * near_miss_pad)
+        for x, y, w, h in node_rects
+    ]
+    # Per node, the union of the bbox rejects segment_intersects_rect applies
+    # to the plain and the padded rect (same arithmetic), so candidates that
+    # neither call could accept are dropped before calling it.
+    node_reach = [
+        (
+            min(x - eps, px - eps),
+            min(y - eps, py - eps),
+            max(x + w + eps, px + pw + eps),
+            max(y + h + eps, py + ph + eps),
+        )
+        for (x, y, w, h), (px, py, pw, ph) in zip(node_rects, padded_node_rects)
+    ]
+    node_grid = build_rect_grid(node_rects, pad=eps)
+    pair_candidates = sweep_segment_pairs(flat_segments)
+    # Pairs sharing an endpoint (within eps) are skipped; comparing endpoint
+    # grid cells first leaves the exact distance checks to the few pairs
+    # whose endpoints are actually close.
+    segment_cells = [endpoint_cells((a, b), eps) for _, a, b in segments]
+    segment_near_cells = [neighbor_cells(cells) for cells in segment_cells]
+    # Segment bboxes are computed once and shared by the grid query, the
+    # reach reject and both segment_intersects_rect calls per candidate.
+    segment_bounds = [
+        (min(ax1, ax2), min(ay1, ay2), max(ax1, ax2), max(ay1, ay2))
+        for _, _, _, ax1, ay1, ax2, ay2 in flat_segments
+    ]
+    for i, (ei, a1, a2, ax1, ay1, ax2, ay2) in enumerate(flat_segments):
         edge = edges[ei]
         from_id = edge.get("from")
         to_id = edge.get("to")
-        for node_id, node in nodes.items():
+        bounds = segment_bounds[i]
+        min_x, min_y, max_x, max_y = bounds
+        for k in query_rect_grid(
+            node_grid,
+            len(node_rects),
+            min_x - near_miss_pad,
+            min_y - near_miss_pad,
+            max_x + near_miss_pad,
+            max_y + near_miss_pad,
+        ):
+            reach_x1, reach_y1, reach_x2, reach_y2 = node_reach[k]
+            if max_x < reach_x1 or min_x > reach_x2 or max_y < reach_y1 or min_y > reach_y2:
+                continue
+            node_id = node_ids[k]
             if node_id == from_id or node_id == to_id:
                 continue
-            rect = (node["x"], node["y"], node["width"], node["height"])
-            if segment_intersects_rect(a1, a2, rect):
+            rect = node_rects[k]
+            if segment_intersects_rect(a1, a2, rect, bounds=bounds):
                 edge_node_crossings += 1
                 edge_node_crossing_length += segment_rect_overlap_length(a1, a2, rect)
-        for j in range(i + 1, len(segments)):
-            ej, b1, b2 = segments[j]
+            elif segment_intersects_rect(a1, a2, padded_node_rects[k], bounds=bounds):
+                edge_node_near_miss_pairs.add((ei, node_id))
+        adx = ax2 - ax1
+        ady = ay2 - ay1
+        a_len = segment_lengths[i]
+        near_cells = segment_near_cells[i]
+        for j in pair_candidates[i]:
+            ej, b1, b2, bx1, by1, bx2, by2 = flat_segments[j]
             if ei == ej:
                 continue
-            if dist(a1, b1) < 1e-6 or dist(a1, b2) < 1e-6 or dist(a2, b1) < 1e-6 or dist(a2, b2) < 1e-6:
+            if not near_cells.isdisjoint(segment_cells[j]) and (
+                hypot(ax1 - bx1, ay1 - by1) < eps
+                or hypot(ax1 - bx2, ay1 - by2) < eps
+                or hypot(ax2 - bx1, ay2 - by1) < eps
+                or hypot(ax2 - bx2, ay2 - by2) < eps
+            ):
                 continue
-            if segments_intersect(a1, a2, b1, b2):
+            bdx = bx2 - bx1
+            bdy = by2 - by1
+            # o3 reuses o1's endpoint deltas: negating a float is exact, so
+            # bdy * dx1 - bdx * dy1 is bit-identical to the orientation of a1
+            # against b1b2 computed from scratch.
+            dx1 = bx1 - ax1
+            dy1 = by1 - ay1
+            o1 = adx * dy1 - ady * dx1
+            o2 = adx * (by2 - ay1) - ady * (bx2 - ax1)
+            o3 = bdy * dx1 - bdx * dy1
+            o4 = bdx * (ay2 - by1) - bdy * (ax2 - bx1)
+            # Decide on the sign products first; the near-zero (collinear or
+            # touching) cases are only examined when the generic test fails
+            # or every orientation could be ~0.
+            near1 = -eps < o1 < eps
+            near2 = -eps < o2 < eps
+            if o1 * o2 < 0 and o3 * o4 < 0:
+                crosses = not (near1 and near2 and -eps < o3 < eps and -eps < o4 < eps)
+            else:
+                near3 = -eps < o3 < eps
+                near4 = -eps < o4 < eps
+                crosses = not (near1 and near2 and near3 and near4) and (
+                    (near1 and on_segment(a1, a2, b1, eps))
+                    or (near2 and on_segment(a1, a2, b2, eps))
+                    or (near3 and on_segment(b1, b2, a1, eps))
+                    or (near4 and on_segment(b1, b2, a2, eps))
+                )
+            if crosses:
                 edge_crossings += 1
                 crossing_count_with_angle += 1
-                angle = crossing_angle_degrees(a1, a2, b1, b2)
+                # Reuse the pair's deltas and the first-pass segment lengths
+                # for the acute crossing angle.
+                angle = angle_between(adx, ady, a_len, bdx, bdy, segment_lengths[j])
                 crossing_angle_penalty += max(0.0, (35.0 - angle) / 35.0)
-            edge_overlap_length += collinear_overlap_length(a1, a2, b1, b2)
-
-    port_counts = {node_id: {"left": 0, "right": 0, "top": 0, "bottom": 0} for node_id in nodes}
-    for edge, points in zip(edges, edge_points):
-        if len(points) < 2:
-            continue
-        from_id = edge.get("from")
-        to_id = edge.get("to")
-        from_side_eval = "unknown"
-        to_side_eval = "unknown"
-        if from_id in nodes:
-            from_node = nodes[from_id]
-            side = infer_side(from_node, points[0])
-            if side in port_counts[from_id]:
-                port_counts[from_id][side] += 1
-            tol = max(1.0, min(from_node["width"], from_node["height"]) * 0.04)
-            from_side_eval = infer_side(from_node, points[0], tol=tol)
-            boundary_error = point_rect_boundary_distance(points[0], from_node)
-            endpoint_boundary_error_sum += boundary_error
-            endpoint_boundary_error_count += 1
-            if boundary_error > 1.5:
-                endpoint_off_boundary_count += 1
-
-            exit_side = dominant_axis_side(
-                points[1][0] - points[0][0],
-                points[1][1] - points[0][1],
-            )
-            if from_side_eval != "unknown" and exit_side is not None:
-                port_direction_comparable += 1
-                if exit_side != from_side_eval:
-                    port_direction_misalignment_count += 1
-        if to_id in nodes:
-            to_node = nodes[to_id]
-            side = infer_side(to_node, points[-1])
-            if side in port_counts[to_id]:
-                port_counts[to_id][side] += 1
-            tol = max(1.0, min(to_node["width"], to_node["height"]) * 0.04)
-            to_side_eval = infer_side(to_node, points[-1], tol=tol)
-            boundary_error = point_rect_boundary_distance(points[-1], to_node)
-            endpoint_boundary_error_sum += boundary_error
-            endpoint_boundary_error_count += 1
-            if boundary_error > 1.5:
-                endpoint_off_boundary_count += 1
-
-            enter_side = dominant_axis_side(
-                points[-1][0] - points[-2][0],
-                points[-1][1] - points[-2][1],
-            )
-            expected_enter_side = opposite_side(to_side_eval)
-            if expected_enter_side is not None and enter_side is not None:
-                port_direction_comparable += 1
-                if enter_side != expected_enter_side:
-                    port_direction_misalignment_count += 1
-
-        if from_id in nodes and to_id in nodes:
-            expected_from_side = expected_side_towards(nodes[from_id], nodes[to_id])
-            if expected_from_side is not None:
-                port_target_side_comparable += 1
-                if from_side_eval != expected_from_side:
-                    port_target_side_mismatch_count += 1
-            expected_to_side = expected_side_towards(nodes[to_id], nodes[from_id])
-            if expected_to_side is not None:
-                port_target_side_comparable += 1
-                if to_side_eval != expected_to_side:
-                    port_target_side_mismatch_count += 1
+            if -eps <= o1 <= eps and -eps <= o2 <= eps:
+                edge_overlap_length += collinear_overlap_length(a1, a2, b1, b2)
 
     for counts in port_counts.values():
-        for count in counts.values():
+        for count in counts:
             if count > 1:
                 port_congestion += count - 1
 
     if subgraph_rects:
-        for edge, points in zip(edges, edge_points):
-            if len(points) < 2:
+        for edge, point_segments in zip(edges, edge_segments):
+            if not point_segments:
                 continue
             from_id = edge.get("from")
             to_id = edge.get("to")
@@ -731,38 +1064,53 @@ def compute_metrics(data, nodes, edges):
                 if from_key in member_nodes or to_key in member_nodes:
                     continue
                 overlap_len = 0.0
-                for a, b in segments_from_points(points):
+                for a, b in point_segments:
                     overlap_len += segment_rect_overlap_length(a, b, rect)
                 if overlap_len > 1e-6:
                     subgraph_boundary_intrusion_pairs += 1
                     subgraph_boundary_intrusion_length += overlap_len
 
-    parallel_groups = {}
-    for idx, edge in enumerate(edges):
-        from_id = edge.get("from")
-        to_id = edge.get("to")
-        if from_id is None or to_id is None:
-            continue
-        key = tuple(sorted((str(from_id), str(to_id))))
-        parallel_groups.setdefault(key, []).append(idx)
+    # Segments whose padded bboxes are apart have no collinear overlap (see
+    # sweep_segment_pairs), so those pairs are skipped; boxes are built once
+    # per edge and are None when a coordinate is not finite.
+    edge_segment_boxes = {}
+
+    def segment_boxes(edge_idx):
+        boxes = edge_segment_boxes.get(edge_idx)
+        if boxes is None:
+            boxes = [(a, b, padded_segment_box(a, b)) for a, b in edge_segments[edge_idx]]
+            edge_segment_boxes[edge_idx] = boxes
+        return boxes
 
     for group_edges in parallel_groups.values():
-        if len(group_edges) < 2:
-            continue
-        for i in range(len(group_edges)):
-            for j in range(i + 1, len(group_edges)):
-                ia = group_edges[i]
-                ib = group_edges[j]
-                points_a = edge_points[ia]
+        # Edges without a routed path never pair up, so they are dropped
+        # before the upper-triangle loop; per-edge values are bound once in
+        # the outer loop.
+        routed = [idx for idx in group_edges if len(edge_points[idx]) >= 2]
+        for i, ia in enumerate(routed):
+            points_a = edge_points[ia]
+            boxes_a = segment_boxes(ia)
+            path_len_a = edge_path_lengths[ia]
+            for ib in routed[i + 1 :]:
                 points_b = edge_points[ib]
-                if len(points_a) < 2 or len(points_b) < 2:
-                    continue
+                boxes_b = segment_boxes(ib)
                 parallel_edge_pair_count += 1
                 overlap_len = 0.0
-                for a1, a2 in segments_from_points(points_a):
-                    for b1, b2 in segments_from_points(points_b):
+                for a1, a2, box_a in boxes_a:
+                    for b1, b2, box_b in boxes_b:
+                        if (
+                            box_a is not None
+                            and box_b is not None
+                            and (
+                                box_a[2] < box_b[0]
+                                or box_b[2] < box_a[0]
+                                or box_a[3] < box_b[1]
+                                or box_b[3] < box_a[1]
+                            )
+                        ):
+                            continue
                         overlap_len += collinear_overlap_length(a1, a2, b1, b2)
-                min_len = max(min(edge_path_lengths[ia], edge_path_lengths[ib]), 1e-6)
+                min_len = max(min(path_len_a, edge_path_lengths[ib]), 1e-6)
                 overlap_ratio = clamp(overlap_len / min_len, 0.0, 1.0)
                 parallel_edge_overlap_ratios.append(overlap_ratio)
                 if overlap_ratio > 0.25:
@@ -771,54 +1119,9 @@ def compute_metrics(data, nodes, edges):
                 if separation is not None:
                     parallel_edge_separations.append(separation)
 
-    node_ids = list(nodes.keys())
-    node_spacing_violation_count = 0
-    node_spacing_violation_severity = 0.0
-    median_node_span = 0.0
-    if node_ids:
-        spans = []
-        for node in nodes.values():
-            spans.append(min(max(node["width"], 0.0), max(node["height"], 0.0)))
-        spans = sorted(spans)
-        median_node_span = spans[len(spans) // 2]
-    spacing_target = clamp(median_node_span * 0.25 if median_node_span > 0.0 else 12.0, 8.0, 24.0)
-    for i in range(len(node_ids)):
-        a = nodes[node_ids[i]]
-        ax1, ay1 = a["x"], a["y"]
-        ax2, ay2 = ax1 + a["width"], ay1 + a["height"]
-        for j in range(i + 1, len(node_ids)):
-            b = nodes[node_ids[j]]
-            bx1, by1 = b["x"], b["y"]
-            bx2, by2 = bx1 + b["width"], by1 + b["height"]
-            if ax1 < bx2 and bx1 < ax2 and ay1 < by2 and by1 < ay2:
-                # Overlap is handled by node overlap metrics.
-                continue
-            gap_x = max(0.0, max(bx1 - ax2, ax1 - bx2))
-            gap_y = max(0.0, max(by1 - ay2, ay1 - by2))
-            gap = math.hypot(gap_x, gap_y)
-            if gap < spacing_target:
-                node_spacing_violation_count += 1
-                node_spacing_violation_severity += (spacing_target - gap) / max(spacing_target, 1e-6)
-
-    near_miss_pad = max(4.0, spacing_target * 0.5)
-    for ei, a1, a2 in segments:
-        edge = edges[ei]
-        from_id = edge.get("from")
-        to_id = edge.get("to")
-        for node_id, node in nodes.items():
-            if node_id == from_id or node_id == to_id:
-                continue
-            rect = (node["x"], node["y"], node["width"], node["height"])
-            if segment_intersects_rect(a1, a2, rect):
-                continue
-            padded = (
-                rect[0] - near_miss_pad,
-                rect[1] - near_miss_pad,
-                rect[2] + 2.0 * near_miss_pad,
-                rect[3] + 2.0 * near_miss_pad,
-            )
-            if segment_intersects_rect(a1, a2, padded):
-                edge_node_near_miss_pairs.add((ei, node_id))
+    node_spacing_violation_count, node_spacing_violation_severity = node_spacing_violations(
+        boxes, spacing_target
+    )
 
     angular_resolution_penalty = 0.0
     low_angular_resolution_nodes = 0
@@ -834,17 +1137,17 @@ def compute_metrics(data, nodes, edges):
             low_angular_resolution_nodes += 1
 
     allow_containment = kind == "treemap"
-    overlap_count, overlap_area = node_overlap_metrics(nodes, allow_containment=allow_containment)
-    node_area_total = sum(
-        max(0.0, node["width"]) * max(0.0, node["height"]) for node in nodes.values()
+    overlap_count, overlap_area = node_overlap_metrics(
+        nodes, allow_containment=allow_containment, boxes=boxes
     )
+    node_area_total = sum(max(0.0, w) * max(0.0, h) for _, _, w, h in node_rects)
     width = data.get("width", 0.0) or 0.0
     height = data.get("height", 0.0) or 0.0
     layout_area = width * height
     node_count = len(nodes)
     edge_count = len(edges)
 
-    min_x, min_y, max_x, max_y = compute_content_bounds(nodes, edges)
+    min_x, min_y, max_x, max_y = compute_content_bounds(nodes, edges, boxes=boxes)
     content_width = max(0.0, max_x - min_x)
     content_height = max(0.0, max_y - min_y)
     content_bbox_area = content_width * content_height
@@ -876,17 +1179,14 @@ def compute_metrics(data, nodes, edges):
     disconnected_components = max(0, component_count - 1)
     component_bbox_area_sum = 0.0
     component_areas = []
+    box_by_id = dict(zip(node_ids, boxes))
     for comp in components:
         c_min_x = float("inf")
         c_min_y = float("inf")
         c_max_x = float("-inf")
         c_max_y = float("-inf")
         for node_id in comp:
-            node = nodes[node_id]
-            x1 = node["x"]
-            y1 = node["y"]
-            x2 = x1 + node["width"]
-            y2 = y1 + node["height"]
+            x1, y1, x2, y2 = box_by_id[node_id]
             c_min_x = min(c_min_x, x1)
             c_min_y = min(c_min_y, y1)
             c_max_x = max(c_max_x, x2)
@@ -1106,10 +1406,53 @@ def weighted_score(metrics):
     return score
 
 
+def score_layout(path: Path):
+    data, nodes, edges = load_layout(path)
+    metrics = compute_metrics(data, nodes, edges)
+    metrics["score"] = weighted_score(metrics)
+    return metrics
+
+
+def score_cache_stamp(path: Path):
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def score_script_digest() -> str:
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+def load_score_cache(cache_path: Path, script_digest: str):
+    # Entries are only reusable for the same schema and scoring code.
+    if not cache_path.exists():
+        return {}
+    try:
+        data = load_json(cache_path)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if data.get("schema") != SCORE_CACHE_SCHEMA_VERSION or data.get("script") != script_digest:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
 def main():
     parser = argparse.ArgumentParser(description="Score layout dumps for objective metrics")
     parser.add_argument("--input", required=True, help="layout dump file or directory")
     parser.add_argument("--output", default="", help="write JSON summary to file")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, min(4, os.cpu_count() or 1)),
+        help="parallel scoring processes for directory input (default: min(4, cpu_count))",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="rescore every dump instead of reusing <output>.cache.json entries",
+    )
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -1118,17 +1461,60 @@ def main():
     else:
         files = [input_path]
 
+    # With --output, metrics are cached next to it keyed by each dump's
+    # resolved path, mtime and size, so unchanged dumps are not rescored.
+    cache_path = Path(f"{args.output}.cache.json") if args.output and not args.no_cache else None
+    script_digest = score_script_digest() if cache_path else ""
+    cache = load_score_cache(cache_path, script_digest) if cache_path else {}
+    keys = []
+    entries = []
+    stale = []
+    for index, path in enumerate(files):
+        key = str(path.resolve())
+        stamp = score_cache_stamp(path)
+        entry = cache.get(key)
+        keys.append(key)
+        if isinstance(entry, dict) and entry.get("stamp") == stamp and isinstance(entry.get("metrics"), dict):
+            entries.append(entry)
+        else:
+            entries.append(None)
+            stale.append((index, path, stamp))
+
+    stale_paths = [path for _, path, _ in stale]
+    if args.jobs <= 1 or len(stale_paths) <= 1:
+        scored = [score_layout(path) for path in stale_paths]
+    else:
+        # Batch dumps per task so IPC round trips stay small next to scoring;
+        # about four batches per worker still balances uneven dump sizes.
+        chunksize = max(1, len(stale_paths) // (args.jobs * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            scored = list(pool.map(score_layout, stale_paths, chunksize=chunksize))
+    for (index, _, stamp), metrics in zip(stale, scored):
+        entries[index] = {"stamp": stamp, "metrics": metrics}
+
+    # Fill results in one pass over the sorted files, as an uncached run does:
+    # dumps in different directories can share a name, and the last one must
+    # win whichever of them came from the cache.
     results = {}
-    for path in files:
-        data, nodes, edges = load_layout(path)
-        metrics = compute_metrics(data, nodes, edges)
-        metrics["score"] = weighted_score(metrics)
-        results[path.name] = metrics
+    cache_entries = {}
+    for path, key, entry in zip(files, keys, entries):
+        results[path.name] = entry["metrics"]
+        cache_entries[key] = entry
+
+    if cache_path:
+        write_json(
+            cache_path,
+            {
+                "schema": SCORE_CACHE_SCHEMA_VERSION,
+                "script": script_digest,
+                "entries": cache_entries,
+            },
+        )
 
     if args.output:
-        Path(args.output).write_text(json.dumps(results, indent=2))
+        write_json(Path(args.output), results)
     else:
-        print(json.dumps(results, indent=2))
+        print(dump_json(results))
 
 
 if __name__ == "__main__":
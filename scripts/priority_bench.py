@@ -4,11 +4,15 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import datetime
 import getpass
+import heapq
 import importlib.util
 import json
 import math
+import operator
+import os
 import platform
 import re
 import socket
@@ -16,6 +20,8 @@ import statistics
 import subprocess
 import sys
 import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -93,6 +99,7 @@ DEFAULT_PRIORITY_METRICS = [
 ]
 
 
+@lru_cache(maxsize=None)
 def load_layout_score():
     module_path = ROOT / "scripts" / "layout_score.py"
     spec = importlib.util.spec_from_file_location("layout_score", module_path)
@@ -103,6 +110,7 @@ def load_layout_score():
     return module
 
 
+@lru_cache(maxsize=None)
 def load_quality_bench():
     module_path = ROOT / "scripts" / "quality_bench.py"
     spec = importlib.util.spec_from_file_location("quality_bench", module_path)
@@ -113,10 +121,42 @@ def load_quality_bench():
     return module
 
 
+@lru_cache(maxsize=None)
+def load_profile_summary():
+    module_path = ROOT / "scripts" / "profile_summary.py"
+    spec = importlib.util.spec_from_file_location("profile_summary", module_path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("failed to load profile_summary.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[call-arg]
+    return module
+
+
 def run(cmd: list[str]) -> subprocess.CompletedProcess[str]:
     return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
 
+def run_timed(cmd: list[str]) -> tuple[int, dict[str, Any] | None, str]:
+    """Run an mmdr --timing command, keeping only the last timing payload.
+
+    stderr is streamed line by line instead of buffered whole; only its head is
+    kept for error messages. Returns ``(returncode, timing, stderr_head)``.
+    """
+    timing: dict[str, Any] | None = None
+    head: list[str] = []
+    head_len = 0
+    with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True) as proc:
+        assert proc.stderr is not None
+        for line in proc.stderr:
+            if head_len < 300 and (head or line.strip()):
+                head.append(line)
+                head_len += len(line)
+            payload = parse_timing(line)
+            if payload is not None:
+                timing = payload
+    return proc.returncode, timing, "".join(head).strip()[:300]
+
+
 def iso_utc_now() -> str:
     return datetime.datetime.now(datetime.timezone.utc).isoformat()
 
@@ -128,17 +168,28 @@ def git_metadata() -> dict[str, Any]:
             return ""
         return res.stdout.strip()
 
-    commit = git(["rev-parse", "HEAD"])
+    # The porcelain v2 branch headers carry the commit and branch name, so one
+    # status call replaces the separate rev-parse lookups.
+    commit = ""
+    branch = ""
+    dirty = False
+    for line in git(["status", "--porcelain=v2", "--branch"]).splitlines():
+        if line.startswith("# branch.oid "):
+            oid = line[len("# branch.oid ") :]
+            commit = "" if oid == "(initial)" else oid
+        elif line.startswith("# branch.head "):
+            head = line[len("# branch.head ") :]
+            branch = "HEAD" if head == "(detached)" else head
+        elif not line.startswith("#"):
+            dirty = True
     short = commit[:12] if commit else ""
-    branch = git(["rev-parse", "--abbrev-ref", "HEAD"])
     describe = git(["describe", "--always", "--dirty", "--tags"])
-    status = git(["status", "--porcelain"])
     return {
         "commit": commit,
         "commit_short": short,
         "branch": branch,
         "describe": describe,
-        "dirty": bool(status),
+        "dirty": dirty,
     }
 
 
@@ -158,6 +209,20 @@ def append_benchmark_history(history_path: Path, record: dict[str, Any]) -> None
         handle.write("\n")
 
 
+def write_json(path: Path, value: Any) -> None:
+    # Write beside the target and rename over it, so an interrupted run never
+    # leaves a truncated report behind.
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        # Stream the encoder's chunks instead of building the whole string.
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(value, handle, indent=2)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, path)
+
+
 def resolve_bin(path_str: str) -> Path:
     path = Path(path_str)
     if path.exists() or path_str == "mmdr":
@@ -175,7 +240,8 @@ def build_release(bin_path: Path) -> None:
             should_build = bin_path.resolve().is_relative_to(target_release.resolve())
         except ValueError:
             should_build = False
-    if not should_build:
+    # Skip cargo's own up-to-date check when no manifest or source is newer.
+    if not should_build or not load_quality_bench().bin_needs_rebuild(bin_path):
         return
     res = run(["cargo", "build", "--release"])
     if res.returncode != 0:
@@ -189,10 +255,10 @@ def collect_fixtures(fixtures: list[Path], patterns: list[str], limit: int) -> l
             files.append(base)
             continue
         if base.exists():
-            files.extend(sorted(base.glob("**/*.mmd")))
+            files.extend(sorted(load_profile_summary().iter_mmd_files(base)))
     if patterns:
         rx = [re.compile(pattern) for pattern in patterns]
-        files = [path for path in files if any(r.search(str(path)) for r in rx)]
+        files = [path for path, text in zip(files, map(str, files)) if any(r.search(text) for r in rx)]
     if limit > 0:
         files = files[:limit]
     return files
@@ -201,7 +267,9 @@ def collect_fixtures(fixtures: list[Path], patterns: list[str], limit: int) -> l
 def parse_timing(stderr: str) -> dict[str, Any] | None:
     for line in reversed(stderr.strip().splitlines()):
         line = line.strip()
-        if not line:
+        # Only a JSON object can be a timing payload; skip log lines without
+        # paying for a failed parse.
+        if not (line.startswith("{") and line.endswith("}")):
             continue
         try:
             payload = json.loads(line)
@@ -213,6 +281,13 @@ def parse_timing(stderr: str) -> dict[str, Any] | None:
 
 
 def safe_num(value: Any) -> float:
+    # Metric values are nearly always plain floats or ints; skip the generic
+    # conversion path for those.
+    kind = type(value)
+    if kind is float:
+        return value if math.isfinite(value) else 0.0
+    if kind is int:
+        return float(value)
     try:
         number = float(value)
     except (TypeError, ValueError):
@@ -222,19 +297,6 @@ def safe_num(value: Any) -> float:
     return number
 
 
-def correlation(values_a: list[float], values_b: list[float]) -> float:
-    if len(values_a) != len(values_b) or len(values_a) < 2:
-        return 0.0
-    mean_a = statistics.mean(values_a)
-    mean_b = statistics.mean(values_b)
-    std_a = statistics.pstdev(values_a)
-    std_b = statistics.pstdev(values_b)
-    if std_a < 1e-9 or std_b < 1e-9:
-        return 0.0
-    cov = sum((a - mean_a) * (b - mean_b) for a, b in zip(values_a, values_b)) / len(values_a)
-    return cov / (std_a * std_b)
-
-
 def derive_weight_model(
     rows: list[dict[str, Any]],
     metric_keys: list[str],
@@ -244,12 +306,22 @@ def derive_weight_model(
     normalized: dict[str, list[float]] = {}
     active_keys: list[str] = []
 
+    # Resolve each row's metrics dict once rather than once per metric key.
+    row_metrics = [row.get("metrics", {}) for row in rows]
     for key in metric_keys:
-        vals = [safe_num(row.get("metrics", {}).get(key, 0.0)) for row in rows]
+        # Track the bounds while extracting instead of rescanning with min/max.
+        vals: list[float] = []
+        lo = math.inf
+        hi = -math.inf
+        for metrics in row_metrics:
+            value = safe_num(metrics.get(key, 0.0))
+            vals.append(value)
+            if value < lo:
+                lo = value
+            if value > hi:
+                hi = value
         if not vals:
             continue
-        lo = min(vals)
-        hi = max(vals)
         span = hi - lo
         stats[key] = {"min": lo, "max": hi}
         if span < 1e-9:
@@ -273,17 +345,41 @@ def derive_weight_model(
     else:
         # CRITIC-style data-driven importance:
         # high variance and low correlation to other metrics -> higher weight.
-        raw = {}
+        # Each metric is centered once so the K^2 pairwise Pearson correlations
+        # below reduce to dot products of the centered columns, divided by the
+        # row count and both population standard deviations.
+        count = len(rows)
+        centered: dict[str, list[float]] = {}
+        spread: dict[str, float] = {}
         for key in active_keys:
             vals = normalized[key]
-            std = statistics.pstdev(vals)
+            mean = statistics.mean(vals)
+            centered[key] = [v - mean for v in vals]
+            spread[key] = statistics.pstdev(vals)
+
+        # Correlation is symmetric, so each unordered pair is computed once.
+        corr_cache: dict[tuple[str, str], float] = {}
+        for idx, key in enumerate(active_keys):
+            std = spread[key]
+            cols = centered[key]
+            for other in active_keys[idx + 1 :]:
+                other_std = spread[other]
+                if count < 2 or std < 1e-9 or other_std < 1e-9:
+                    corr = 0.0
+                else:
+                    cov = sum(map(operator.mul, cols, centered[other])) / count
+                    corr = cov / (std * other_std)
+                corr_cache[(key, other)] = corr
+                corr_cache[(other, key)] = corr
+
+        raw = {}
+        for key in active_keys:
             contrast = 0.0
             for other in active_keys:
                 if other == key:
                     continue
-                corr = correlation(vals, normalized[other])
-                contrast += 1.0 - abs(corr)
-            raw[key] = std * max(contrast, 1e-6)
+                contrast += 1.0 - abs(corr_cache[(key, other)])
+            raw[key] = spread[key] * max(contrast, 1e-6)
 
     total = sum(raw.values())
     if total <= 1e-12:
@@ -332,6 +428,12 @@ def apply_priority_scores(results: list[dict[str, Any]], model: dict[str, Any])
         item["priority"] = {
             "pain_score": score,
             "pain_per_layout_ms": score / layout_ms,
+            "space_stress": (
+                safe_num(row.get("wasted_space_ratio", 0.0))
+                + safe_num(row.get("component_gap_ratio", 0.0))
+                + safe_num(row.get("content_center_offset_ratio", 0.0))
+                + safe_num(row.get("content_overflow_ratio", 0.0))
+            ),
             "hard_violations": (
                 int(safe_num(row.get("edge_crossings", 0.0)) > 0)
                 + int(safe_num(row.get("edge_node_crossings", 0.0)) > 0)
@@ -359,17 +461,33 @@ def print_weight_model(model: dict[str, Any], top_n: int = 10) -> None:
 
 
 def summarize_timing(samples: list[dict[str, Any]]) -> dict[str, float]:
-    parse_ms = [sample["parse_us"] / 1000.0 for sample in samples]
-    layout_ms = [sample["layout_us"] / 1000.0 for sample in samples]
-    render_ms = [sample["render_us"] / 1000.0 for sample in samples]
-    total_ms = [sample["total_us"] / 1000.0 for sample in samples]
+    # One pass over the samples: plain sums for the parse/render means and
+    # Welford updates for the two timings whose spread is reported.
+    if not samples:
+        raise ValueError("summarize_timing requires at least one sample")
+    parse_sum = 0.0
+    render_sum = 0.0
+    layout_mean = layout_m2 = 0.0
+    total_mean = total_m2 = 0.0
+    for count, sample in enumerate(samples, start=1):
+        parse_sum += sample["parse_us"] / 1000.0
+        render_sum += sample["render_us"] / 1000.0
+        value = sample["layout_us"] / 1000.0
+        delta = value - layout_mean
+        layout_mean += delta / count
+        layout_m2 += delta * (value - layout_mean)
+        value = sample["total_us"] / 1000.0
+        delta = value - total_mean
+        total_mean += delta / count
+        total_m2 += delta * (value - total_mean)
+    count = len(samples)
     return {
-        "parse_ms": statistics.mean(parse_ms),
-        "layout_ms": statistics.mean(layout_ms),
-        "render_ms": statistics.mean(render_ms),
-        "total_ms": statistics.mean(total_ms),
-        "layout_ms_std": statistics.pstdev(layout_ms) if len(layout_ms) > 1 else 0.0,
-        "total_ms_std": statistics.pstdev(total_ms) if len(total_ms) > 1 else 0.0,
+        "parse_ms": parse_sum / count,
+        "layout_ms": layout_mean,
+        "render_ms": render_sum / count,
+        "total_ms": total_mean,
+        "layout_ms_std": math.sqrt(layout_m2 / count) if count > 1 else 0.0,
+        "total_ms_std": math.sqrt(total_m2 / count) if count > 1 else 0.0,
     }
 
 
@@ -381,59 +499,60 @@ def benchmark_fixture(
     warmup: int,
     layout_score_mod,
     quality_bench_mod,
+    scratch_dir: Path,
 ) -> dict[str, Any]:
-    with tempfile.TemporaryDirectory(prefix="priority-bench-") as tmp_dir:
-        tmp = Path(tmp_dir)
-        svg_path = tmp / "out.svg"
-        layout_path = tmp / "layout.json"
-        cmd = [
-            str(bin_path),
-            "-i",
-            str(fixture),
-            "-o",
-            str(svg_path),
-            "-e",
-            "svg",
-            "--dumpLayout",
-            str(layout_path),
-            "--timing",
-        ]
-        if config_path.exists():
-            cmd += ["-c", str(config_path)]
-
-        timings: list[dict[str, Any]] = []
-        for idx in range(warmup + runs):
-            result = run(cmd)
-            if result.returncode != 0:
-                return {
-                    "fixture": str(fixture),
-                    "error": result.stderr.strip()[:300] or "render failed",
-                }
-            timing = parse_timing(result.stderr)
-            if timing is None:
-                return {
-                    "fixture": str(fixture),
-                    "error": "missing --timing payload",
-                }
-            if idx >= warmup:
-                timings.append(timing)
-
-        data, nodes, edges = layout_score_mod.load_layout(layout_path)
-        metrics = layout_score_mod.compute_metrics(data, nodes, edges)
-        metrics["score"] = layout_score_mod.weighted_score(metrics)
-        try:
-            label_metrics = quality_bench_mod.compute_label_metrics(svg_path, nodes, edges)
-            metrics.update(label_metrics)
-        except Exception:
-            # Keep benchmark resilient if label parsing fails on a fixture.
-            pass
-        timing_summary = summarize_timing(timings)
+    # Each worker thread reuses its own pair of scratch files across fixtures;
+    # mmdr truncates both on every run that writes them.
+    tag = threading.get_ident()
+    svg_path = scratch_dir / f"{tag}-out.svg"
+    layout_path = scratch_dir / f"{tag}-layout.json"
+    cmd = [
+        str(bin_path),
+        "-i",
+        str(fixture),
+        "-e",
+        "svg",
+        "--timing",
+    ]
+    if config_path.exists():
+        cmd += ["-c", str(config_path)]
+    # Only the first run writes the SVG and layout dump scored below. mmdr
+    # writes both outside its timed stages, so later runs just send the SVG
+    # to the discarded stdout without skewing the timing.
+    quality_cmd = cmd + ["-o", str(svg_path), "--dumpLayout", str(layout_path)]
+
+    timings: list[dict[str, Any]] = []
+    for idx in range(warmup + runs):
+        returncode, timing, stderr_head = run_timed(quality_cmd if idx == 0 else cmd)
+        if returncode != 0:
+            return {
+                "fixture": str(fixture),
+                "error": stderr_head or "render failed",
+            }
+        if timing is None:
+            return {
+                "fixture": str(fixture),
+                "error": "missing --timing payload",
+            }
+        if idx >= warmup:
+            timings.append(timing)
+
+    data, nodes, edges = layout_score_mod.load_layout(layout_path)
+    metrics = layout_score_mod.compute_metrics(data, nodes, edges)
+    metrics["score"] = layout_score_mod.weighted_score(metrics)
+    try:
+        label_metrics = quality_bench_mod.compute_label_metrics(svg_path, nodes, edges)
+        metrics.update(label_metrics)
+    except Exception:
+        # Keep benchmark resilient if label parsing fails on a fixture.
+        pass
+    timing_summary = summarize_timing(timings)
 
-        return {
-            "fixture": str(fixture),
-            "metrics": metrics,
-            "timing": timing_summary,
-        }
+    return {
+        "fixture": str(fixture),
+        "metrics": metrics,
+        "timing": timing_summary,
+    }
 
 
 def print_priorities(results: list[dict[str, Any]], top_n: int) -> None:
@@ -490,24 +609,16 @@ def print_priorities(results: list[dict[str, Any]], top_n: int) -> None:
             f"layout={timing['layout_ms']:.2f}ms"
         )
 
-    by_space = sorted(
-        ok,
-        key=lambda entry: (
-            safe_num(entry["metrics"].get("wasted_space_ratio", 0.0))
-            + safe_num(entry["metrics"].get("component_gap_ratio", 0.0))
-            + safe_num(entry["metrics"].get("content_center_offset_ratio", 0.0))
-            + safe_num(entry["metrics"].get("content_overflow_ratio", 0.0))
-        ),
-        reverse=True,
-    )
+    by_space = sorted(ok, key=lambda entry: entry["priority"]["space_stress"], reverse=True)
     print()
     print(f"Top {top_n} by space inefficiency:")
     for idx, item in enumerate(by_space[:top_n], start=1):
         metrics = item["metrics"]
         timing = item["timing"]
+        priority = item["priority"]
         print(
             f"{idx}. {item['fixture']}  "
-            f"space_stress={safe_num(metrics.get('wasted_space_ratio', 0.0)) + safe_num(metrics.get('component_gap_ratio', 0.0)) + safe_num(metrics.get('content_center_offset_ratio', 0.0)) + safe_num(metrics.get('content_overflow_ratio', 0.0)):.3f}  "
+            f"space_stress={priority['space_stress']:.3f}  "
             f"wasted={metrics.get('wasted_space_ratio', 0.0):.2f}  "
             f"comp-gap={metrics.get('component_gap_ratio', 0.0):.2f}  "
             f"center={metrics.get('content_center_offset_ratio', 0.0):.2f}  "
@@ -548,7 +659,12 @@ def summarize_priority_history(results: list[dict[str, Any]]) -> dict[str, Any]:
         if len(pain_scores) == 1:
             pain_p95 = pain_scores[0]
         else:
-            pain_p95 = statistics.quantiles(pain_scores, n=20, method="inclusive")[18]
+            # Same value as statistics.quantiles(n=20, method="inclusive")[18],
+            # which interpolates between two adjacent order statistics; select
+            # just the top slice holding them instead of sorting everything.
+            j, delta = divmod(19 * (len(pain_scores) - 1), 20)
+            top = heapq.nlargest(len(pain_scores) - j, pain_scores)
+            pain_p95 = (top[-1] * (20 - delta) + top[-2] * delta) / 20
 
     return {
         "fixture_count": len(results),
@@ -587,6 +703,12 @@ def main() -> None:
     )
     parser.add_argument("--runs", type=int, default=3, help="Measured runs per fixture")
     parser.add_argument("--warmup", type=int, default=1, help="Warmup runs per fixture")
+    parser.add_argument(
+        "--mmdr-jobs",
+        type=int,
+        default=1,
+        help="parallel jobs for mmdr fixture runs; >1 lets runs contend for CPU and skews timings (default: 1)",
+    )
     parser.add_argument(
         "--weight-mode",
         choices=["auto", "manual"],
@@ -623,6 +745,8 @@ def main() -> None:
         help="disable benchmark history JSONL logging for this run",
     )
     args = parser.parse_args()
+    if args.runs < 1:
+        raise SystemExit("--runs must be at least 1")
 
     fixture_roots = [Path(path) for path in args.fixtures if path]
     if not fixture_roots:
@@ -639,20 +763,29 @@ def main() -> None:
     layout_score_mod = load_layout_score()
     quality_bench_mod = load_quality_bench()
 
-    results: list[dict[str, Any]] = []
-    for fixture in fixtures:
-        results.append(
-            benchmark_fixture(
-                fixture=fixture,
-                bin_path=bin_path,
-                config_path=config_path,
-                runs=args.runs,
-                warmup=args.warmup,
-                layout_score_mod=layout_score_mod,
-                quality_bench_mod=quality_bench_mod,
-            )
+    def run_one(fixture: Path) -> dict[str, Any]:
+        return benchmark_fixture(
+            fixture=fixture,
+            bin_path=bin_path,
+            config_path=config_path,
+            runs=args.runs,
+            warmup=args.warmup,
+            layout_score_mod=layout_score_mod,
+            quality_bench_mod=quality_bench_mod,
+            scratch_dir=scratch_dir,
         )
 
+    # Fixtures are independent mmdr subprocess runs, so threads overlap them;
+    # map() keeps results in fixture order.
+    jobs = max(1, args.mmdr_jobs)
+    with tempfile.TemporaryDirectory(prefix="priority-bench-") as tmp_dir:
+        scratch_dir = Path(tmp_dir)
+        if jobs <= 1:
+            results: list[dict[str, Any]] = [run_one(fixture) for fixture in fixtures]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(run_one, fixtures))
+
     metric_keys = args.metric if args.metric else DEFAULT_PRIORITY_METRICS
     ok_results = [entry for entry in results if "error" not in entry]
     model = derive_weight_model(ok_results, metric_keys, mode=args.weight_mode)
@@ -666,7 +799,7 @@ def main() -> None:
         "fixtures": [str(path) for path in fixtures],
         "results": results,
     }
-    output_path.write_text(json.dumps(payload, indent=2))
+    write_json(output_path, payload)
 
     print_weight_model(model, top_n=12)
     print_priorities(results, top_n=max(args.top, 1))
@@ -688,6 +821,7 @@ def main() -> None:
                 "config": str(config_path),
                 "runs": args.runs,
                 "warmup": args.warmup,
+                "mmdr_jobs": jobs,
                 "weight_mode": args.weight_mode,
                 "metrics_requested": metric_keys,
                 "patterns": args.pattern,
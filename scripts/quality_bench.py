@@ -16,15 +16,36 @@ import socket
 import subprocess
 import sys
 import time
-import xml.etree.ElementTree as ET
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    from lxml import etree as ET
+except ImportError:  # pragma: no cover
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+else:
+    HAVE_LXML = True
+
+# lxml parsers are reusable (ElementTree's are single-use), so one is shared
+# across files. lxml keeps comments and processing instructions (whose tag is
+# not a string) unless told otherwise; ElementTree drops them by default.
+# Blank text is kept: extract_text_lines reads it through itertext().
+SVG_PARSER = (
+    ET.XMLParser(remove_comments=True, remove_pis=True, collect_ids=False, huge_tree=True)
+    if HAVE_LXML
+    else None
+)
 
 ROOT = Path(__file__).resolve().parents[1]
 TOKEN_RE = re.compile(r"[AaCcHhLlMmQqSsTtVvZz]|[-+]?(?:\d*\.\d+|\d+)(?:[eE][-+]?\d+)?")
+PATH_COMMANDS = frozenset("AaCcHhLlMmQqSsTtVvZz")
 PIPE_EDGE_LABEL_RE = re.compile(r"\|[^|\n]+\|")
 QUOTED_EDGE_LABEL_RE = re.compile(r"--\s*\"[^\"]+\"")
 SEQUENCE_MESSAGE_LABEL_RE = re.compile(r"-{1,2}[x+o]?>{1,2}.*:\s*\S")
+TRANSLATE_RE = re.compile(r"translate\(([^,\s]+)[,\s]+([^\)]+)\)")
+NUMBER_RE = re.compile(r"[-+]?(?:\d*\.\d+|\d+)")
+WHITESPACE_RE = re.compile(r"\s+")
 MMDC_RENDER_CACHE_SCHEMA_VERSION = 2
 MMDC_METRICS_CACHE_SCHEMA_VERSION = 1
 
@@ -117,8 +138,20 @@ def bin_needs_rebuild(bin_path: Path):
             return True
     src_dir = ROOT / "src"
     if src_dir.exists():
-        for path in src_dir.rglob("*.rs"):
-            if path.stat().st_mtime > bin_mtime:
+        return rust_sources_newer_than(str(src_dir), bin_mtime)
+    return False
+
+
+def rust_sources_newer_than(src_dir: str, mtime: float) -> bool:
+    # Walks like Path.rglob("*.rs"): symlinked directories are not descended
+    # into, so a link loop cannot recurse forever. os.scandir hands back d_type
+    # info without a Path object per entry, and the walk stops at the first
+    # source newer than the binary.
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".rs") and entry.stat().st_mtime > mtime:
+                return True
+            if entry.is_dir(follow_symlinks=False) and rust_sources_newer_than(entry.path, mtime):
                 return True
     return False
 
@@ -132,16 +165,27 @@ def build_release(bin_path: Path):
         raise RuntimeError(res.stderr.strip() or "cargo build failed")
 
 
+def load_svg_root(svg_path: Path):
+    # Hand the parser raw bytes so decoding happens in C; lxml also rejects str
+    # input that carries an XML encoding declaration.
+    data = svg_path.read_bytes()
+    if SVG_PARSER is not None:
+        return ET.fromstring(data, SVG_PARSER)
+    return ET.fromstring(data)
+
+
 def parse_transform(transform: str):
     if not transform:
         return 0.0, 0.0
-    match = re.search(r"translate\(([^,\s]+)[,\s]+([^\)]+)\)", transform)
+    match = TRANSLATE_RE.search(transform)
     if not match:
         return 0.0, 0.0
     return float(match.group(1)), float(match.group(2))
 
 
+@lru_cache(maxsize=256)
 def strip_ns(tag: str) -> str:
+    # A document only has a handful of distinct tags, so results are cached.
     if "}" in tag:
         return tag.split("}", 1)[1]
     return tag
@@ -160,13 +204,38 @@ def parse_points(points: str):
 def parse_svg_number(value: str) -> float:
     if not value:
         return 0.0
-    match = re.search(r"[-+]?(?:\d*\.\d+|\d+)", value)
+    # Bare numbers are the common case; unit-suffixed values ("12px", "50%")
+    # skip straight to the regex instead of raising inside float().
+    if value[-1] in "0123456789.":
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            # float() also takes exponents, digit underscores and inf/nan,
+            # which the regex would cut short; only trust it for plain decimals.
+            if number - number == 0.0 and "e" not in value and "E" not in value and "_" not in value:
+                return number
+    match = NUMBER_RE.search(value)
     return float(match.group(0)) if match else 0.0
 
 
+@lru_cache(maxsize=1024)
+def read_fixture_text(path_str: str, mtime_ns: int, size: int) -> str:
+    return Path(path_str).read_text(encoding="utf-8")
+
+
+def fixture_text(path: Path) -> str:
+    # detect_diagram_kind, expected_sequence_label_count and
+    # fixture_has_edge_label each scan the fixture source, several times per
+    # run; the text is read once per (mtime, size).
+    stat = path.stat()
+    return read_fixture_text(str(path), stat.st_mtime_ns, stat.st_size)
+
+
 def detect_diagram_kind(path: Path):
     try:
-        text = path.read_text(encoding="utf-8")
+        text = fixture_text(path)
     except OSError:
         return ""
     for raw in text.splitlines():
@@ -191,7 +260,7 @@ def detect_diagram_kind(path: Path):
 
 def expected_sequence_label_count(path: Path) -> int:
     try:
-        text = path.read_text(encoding="utf-8")
+        text = fixture_text(path)
     except OSError:
         return 0
     count = 0
@@ -208,7 +277,7 @@ def fixture_has_edge_label(path: Path, diagram_kind: str) -> bool:
     if diagram_kind == "sequence":
         return expected_sequence_label_count(path) > 0
     try:
-        text = path.read_text(encoding="utf-8")
+        text = fixture_text(path)
     except OSError:
         return False
     return bool(PIPE_EDGE_LABEL_RE.search(text) or QUOTED_EDGE_LABEL_RE.search(text))
@@ -241,28 +310,28 @@ def parse_style_map(style: str):
     return result
 
 
-def cubic_point(p0, p1, p2, p3, t: float):
-    it = 1.0 - t
-    x = (
-        it * it * it * p0[0]
-        + 3.0 * it * it * t * p1[0]
-        + 3.0 * it * t * t * p2[0]
-        + t * t * t * p3[0]
-    )
-    y = (
-        it * it * it * p0[1]
-        + 3.0 * it * it * t * p1[1]
-        + 3.0 * it * t * t * p2[1]
-        + t * t * t * p3[1]
-    )
-    return (x, y)
+@lru_cache(maxsize=None)
+def cubic_basis(steps: int):
+    # Bernstein weights for t = 1/steps .. 1. Each weight is multiplied out
+    # left to right in exactly this order (3.0 * it * it * t, not
+    # 3.0 * t * it * it) so sampled points stay bit-identical across runs;
+    # parse_path_points then sums b0 * p0 + b1 * p1 + b2 * p2 + b3 * p3.
+    basis = []
+    for step in range(1, steps + 1):
+        t = step / steps
+        it = 1.0 - t
+        basis.append((it * it * it, 3.0 * it * it * t, 3.0 * it * t * t, t * t * t))
+    return tuple(basis)
 
 
-def quad_point(p0, p1, p2, t: float):
-    it = 1.0 - t
-    x = it * it * p0[0] + 2.0 * it * t * p1[0] + t * t * p2[0]
-    y = it * it * p0[1] + 2.0 * it * t * p1[1] + t * t * p2[1]
-    return (x, y)
+@lru_cache(maxsize=None)
+def quad_basis(steps: int):
+    basis = []
+    for step in range(1, steps + 1):
+        t = step / steps
+        it = 1.0 - t
+        basis.append((it * it, 2.0 * it * t, t * t))
+    return tuple(basis)
 
 
 def parse_path_points(d: str, steps: int = 8):
@@ -270,7 +339,9 @@ def parse_path_points(d: str, steps: int = 8):
     points = []
     if not tokens:
         return points
+    count = len(tokens)
     idx = 0
+    last_idx = -1
     cmd = ""
     cur_x = 0.0
     cur_y = 0.0
@@ -287,22 +358,23 @@ def parse_path_points(d: str, steps: int = 8):
         if abs(last[0] - pt[0]) > 1e-4 or abs(last[1] - pt[1]) > 1e-4:
             points.append(pt)
 
-    def read_float():
-        nonlocal idx
-        val = float(tokens[idx])
-        idx += 1
-        return val
-
-    while idx < len(tokens):
+    while idx < count:
+        # A number the current command has too few arguments left to consume
+        # leaves idx where it was; stop there (SVG renders a path up to its
+        # first error) rather than spinning on it.
+        if idx == last_idx:
+            break
+        last_idx = idx
         token = tokens[idx]
-        if token.isalpha():
+        if token in PATH_COMMANDS:
             cmd = token
             idx += 1
         if cmd in {"M", "m"}:
             first = True
-            while idx + 1 < len(tokens) and not tokens[idx].isalpha():
-                x = read_float()
-                y = read_float()
+            while idx + 1 < count and tokens[idx] not in PATH_COMMANDS:
+                x = float(tokens[idx])
+                y = float(tokens[idx + 1])
+                idx += 2
                 if cmd == "m":
                     x += cur_x
                     y += cur_y
@@ -317,9 +389,10 @@ def parse_path_points(d: str, steps: int = 8):
             prev_cmd = "M"
             continue
         if cmd in {"L", "l"}:
-            while idx + 1 < len(tokens) and not tokens[idx].isalpha():
-                x = read_float()
-                y = read_float()
+            while idx + 1 < count and tokens[idx] not in PATH_COMMANDS:
+                x = float(tokens[idx])
+                y = float(tokens[idx + 1])
+                idx += 2
                 if cmd == "l":
                     x += cur_x
                     y += cur_y
@@ -329,8 +402,9 @@ def parse_path_points(d: str, steps: int = 8):
             prev_cmd = "L"
             continue
         if cmd in {"H", "h"}:
-            while idx < len(tokens) and not tokens[idx].isalpha():
-                x = read_float()
+            while idx < count and tokens[idx] not in PATH_COMMANDS:
+                x = float(tokens[idx])
+                idx += 1
                 if cmd == "h":
                     x += cur_x
                 cur_x = x
@@ -339,8 +413,9 @@ def parse_path_points(d: str, steps: int = 8):
             prev_cmd = "H"
             continue
         if cmd in {"V", "v"}:
-            while idx < len(tokens) and not tokens[idx].isalpha():
-                y = read_float()
+            while idx < count and tokens[idx] not in PATH_COMMANDS:
+                y = float(tokens[idx])
+                idx += 1
                 if cmd == "v":
                     y += cur_y
                 cur_y = y
@@ -349,13 +424,14 @@ def parse_path_points(d: str, steps: int = 8):
             prev_cmd = "V"
             continue
         if cmd in {"C", "c"}:
-            while idx + 5 < len(tokens) and not tokens[idx].isalpha():
-                x1 = read_float()
-                y1 = read_float()
-                x2 = read_float()
-                y2 = read_float()
-                x = read_float()
-                y = read_float()
+            while idx + 5 < count and tokens[idx] not in PATH_COMMANDS:
+                x1 = float(tokens[idx])
+                y1 = float(tokens[idx + 1])
+                x2 = float(tokens[idx + 2])
+                y2 = float(tokens[idx + 3])
+                x = float(tokens[idx + 4])
+                y = float(tokens[idx + 5])
+                idx += 6
                 if cmd == "c":
                     x1 += cur_x
                     y1 += cur_y
@@ -363,23 +439,24 @@ def parse_path_points(d: str, steps: int = 8):
                     y2 += cur_y
                     x += cur_x
                     y += cur_y
-                p0 = (cur_x, cur_y)
-                p1 = (x1, y1)
-                p2 = (x2, y2)
-                p3 = (x, y)
-                for step in range(1, steps + 1):
-                    t = step / steps
-                    add_point(cubic_point(p0, p1, p2, p3, t))
+                for b0, b1, b2, b3 in cubic_basis(steps):
+                    add_point(
+                        (
+                            b0 * cur_x + b1 * x1 + b2 * x2 + b3 * x,
+                            b0 * cur_y + b1 * y1 + b2 * y2 + b3 * y,
+                        )
+                    )
                 cur_x, cur_y = x, y
                 prev_ctrl = (x2, y2)
             prev_cmd = "C"
             continue
         if cmd in {"S", "s"}:
-            while idx + 3 < len(tokens) and not tokens[idx].isalpha():
-                x2 = read_float()
-                y2 = read_float()
-                x = read_float()
-                y = read_float()
+            while idx + 3 < count and tokens[idx] not in PATH_COMMANDS:
+                x2 = float(tokens[idx])
+                y2 = float(tokens[idx + 1])
+                x = float(tokens[idx + 2])
+                y = float(tokens[idx + 3])
+                idx += 4
                 if cmd == "s":
                     x2 += cur_x
                     y2 += cur_y
@@ -391,42 +468,40 @@ def parse_path_points(d: str, steps: int = 8):
                 else:
                     x1 = cur_x
                     y1 = cur_y
-                p0 = (cur_x, cur_y)
-                p1 = (x1, y1)
-                p2 = (x2, y2)
-                p3 = (x, y)
-                for step in range(1, steps + 1):
-                    t = step / steps
-                    add_point(cubic_point(p0, p1, p2, p3, t))
+                for b0, b1, b2, b3 in cubic_basis(steps):
+                    add_point(
+                        (
+                            b0 * cur_x + b1 * x1 + b2 * x2 + b3 * x,
+                            b0 * cur_y + b1 * y1 + b2 * y2 + b3 * y,
+                        )
+                    )
                 cur_x, cur_y = x, y
                 prev_ctrl = (x2, y2)
             prev_cmd = "S"
             continue
         if cmd in {"Q", "q"}:
-            while idx + 3 < len(tokens) and not tokens[idx].isalpha():
-                x1 = read_float()
-                y1 = read_float()
-                x = read_float()
-                y = read_float()
+            while idx + 3 < count and tokens[idx] not in PATH_COMMANDS:
+                x1 = float(tokens[idx])
+                y1 = float(tokens[idx + 1])
+                x = float(tokens[idx + 2])
+                y = float(tokens[idx + 3])
+                idx += 4
                 if cmd == "q":
                     x1 += cur_x
                     y1 += cur_y
                     x += cur_x
                     y += cur_y
-                p0 = (cur_x, cur_y)
-                p1 = (x1, y1)
-                p2 = (x, y)
-                for step in range(1, steps + 1):
-                    t = step / steps
-                    add_point(quad_point(p0, p1, p2, t))
+                for b0, b1, b2 in quad_basis(steps):
+                    add_point((b0 * cur_x + b1 * x1 + b2 * x, b0 * cur_y + b1 * y1 + b2 * y))
                 cur_x, cur_y = x, y
                 prev_ctrl = (x1, y1)
             prev_cmd = "Q"
             continue
         if cmd in {"T", "t"}:
-            while idx + 1 < len(tokens) and not tokens[idx].isalpha():
-                x = read_float()
-                y = read_float()
+            while idx + 1 < count and tokens[idx] not in PATH_COMMANDS:
+                x = float(tokens[idx])
+                y = float(tokens[idx + 1])
+                idx += 2
                 if cmd == "t":
                     x += cur_x
                     y += cur_y
@@ -436,25 +511,22 @@ def parse_path_points(d: str, steps: int = 8):
                 else:
                     x1 = cur_x
                     y1 = cur_y
-                p0 = (cur_x, cur_y)
-                p1 = (x1, y1)
-                p2 = (x, y)
-                for step in range(1, steps + 1):
-                    t = step / steps
-                    add_point(quad_point(p0, p1, p2, t))
+                for b0, b1, b2 in quad_basis(steps):
+                    add_point((b0 * cur_x + b1 * x1 + b2 * x, b0 * cur_y + b1 * y1 + b2 * y))
                 cur_x, cur_y = x, y
                 prev_ctrl = (x1, y1)
             prev_cmd = "T"
             continue
         if cmd in {"A", "a"}:
-            while idx + 6 < len(tokens) and not tokens[idx].isalpha():
-                _rx = read_float()
-                _ry = read_float()
-                _rot = read_float()
-                _laf = read_float()
-                _sf = read_float()
-                x = read_float()
-                y = read_float()
+            while idx + 6 < count and tokens[idx] not in PATH_COMMANDS:
+                _rx = float(tokens[idx])
+                _ry = float(tokens[idx + 1])
+                _rot = float(tokens[idx + 2])
+                _laf = float(tokens[idx + 3])
+                _sf = float(tokens[idx + 4])
+                x = float(tokens[idx + 5])
+                y = float(tokens[idx + 6])
+                idx += 7
                 if cmd == "a":
                     x += cur_x
                     y += cur_y
@@ -482,19 +554,29 @@ def canonical_edge_id(raw) -> str:
         return ""
     if text.startswith("#"):
         text = text[1:]
-    return re.sub(r"\s+", "", text).lower()
+    return WHITESPACE_RE.sub("", text).lower()
 
 
-def parse_mermaid_edges(svg_path: Path):
-    root = ET.fromstring(svg_path.read_text())
+def parse_mermaid_edges(svg_path: Path, root=None):
+    if root is None:
+        root = load_svg_root(svg_path)
     edges = []
 
-    def visit(elem, acc_tx, acc_ty, in_edge_group, inherited_edge_id):
-        tx, ty = parse_transform(elem.attrib.get("transform", ""))
-        cur_tx = acc_tx + tx
-        cur_ty = acc_ty + ty
+    # Iterative pre-order walk; children are pushed in reverse so they are
+    # still visited in document order.
+    stack = [(root, 0.0, 0.0, False, "")]
+    while stack:
+        elem, acc_tx, acc_ty, in_edge_group, inherited_edge_id = stack.pop()
+        transform = elem.get("transform")
+        if transform:
+            tx, ty = parse_transform(transform)
+            cur_tx = acc_tx + tx
+            cur_ty = acc_ty + ty
+        else:
+            cur_tx = acc_tx
+            cur_ty = acc_ty
         tag = strip_ns(elem.tag)
-        cls = elem.attrib.get("class", "")
+        cls = elem.get("class", "")
         cls_lower = cls.lower()
         is_edge_group = (
             in_edge_group
@@ -502,28 +584,31 @@ def parse_mermaid_edges(svg_path: Path):
             or ("links" in cls_lower)
             or (cls_lower == "link")
         )
-        is_edge_class = any(
-            token in cls_lower
-            for token in (
-                "edgepath",
-                "message",
-                "signal",
-                "arrow",
-                "link",
-                "relationship",
-            )
-        )
-        if "actor-line" in cls_lower or "actorline" in cls_lower or "lifeline" in cls_lower:
-            is_edge_class = False
-        has_marker = "marker-end" in elem.attrib or "marker-start" in elem.attrib
-        local_edge_id = elem.attrib.get("data-edge-id") or elem.attrib.get("data-id")
+        local_edge_id = elem.get("data-edge-id") or elem.get("data-id")
+        # Only path/polyline/line elements can become edges; everything else
+        # just passes the group flag and edge id down to its children.
+        is_edge = False
         if tag in {"path", "polyline", "line"}:
-            local_edge_id = local_edge_id or elem.attrib.get("id")
+            local_edge_id = local_edge_id or elem.get("id")
+            # Substring tests on purpose: Mermaid classes such as
+            # "flowchart-link" or "messageLine0" must match too.
+            is_edge_class = (
+                "edgepath" in cls_lower
+                or "message" in cls_lower
+                or "signal" in cls_lower
+                or "arrow" in cls_lower
+                or "link" in cls_lower
+                or "relationship" in cls_lower
+            ) and not (
+                "actor-line" in cls_lower or "actorline" in cls_lower or "lifeline" in cls_lower
+            )
+            has_marker = elem.get("marker-end") is not None or elem.get("marker-start") is not None
+            is_edge = is_edge_group or is_edge_class or has_marker
         edge_id = local_edge_id or inherited_edge_id
 
         if tag == "path":
-            if is_edge_group or is_edge_class or has_marker:
-                d = elem.attrib.get("d", "")
+            if is_edge:
+                d = elem.get("d", "")
                 points = parse_path_points(d)
                 if points:
                     points = [(x + cur_tx, y + cur_ty) for x, y in points]
@@ -536,8 +621,8 @@ def parse_mermaid_edges(svg_path: Path):
                         }
                     )
         elif tag == "polyline":
-            if is_edge_group or is_edge_class or has_marker:
-                pts = parse_points(elem.attrib.get("points", ""))
+            if is_edge:
+                pts = parse_points(elem.get("points", ""))
                 if pts:
                     points = [(x + cur_tx, y + cur_ty) for x, y in pts]
                     resolved_id = edge_id or f"edge-{len(edges)}"
@@ -549,11 +634,11 @@ def parse_mermaid_edges(svg_path: Path):
                         }
                     )
         elif tag == "line":
-            if is_edge_group or is_edge_class or has_marker:
-                x1 = parse_svg_number(elem.attrib.get("x1", "0")) + cur_tx
-                y1 = parse_svg_number(elem.attrib.get("y1", "0")) + cur_ty
-                x2 = parse_svg_number(elem.attrib.get("x2", "0")) + cur_tx
-                y2 = parse_svg_number(elem.attrib.get("y2", "0")) + cur_ty
+            if is_edge:
+                x1 = parse_svg_number(elem.get("x1", "0")) + cur_tx
+                y1 = parse_svg_number(elem.get("y1", "0")) + cur_ty
+                x2 = parse_svg_number(elem.get("x2", "0")) + cur_tx
+                y2 = parse_svg_number(elem.get("y2", "0")) + cur_ty
                 resolved_id = edge_id or f"edge-{len(edges)}"
                 edges.append(
                     {
@@ -563,25 +648,24 @@ def parse_mermaid_edges(svg_path: Path):
                     }
                 )
 
-        for child in list(elem):
-            visit(child, cur_tx, cur_ty, is_edge_group, edge_id)
+        if len(elem):
+            stack.extend((child, cur_tx, cur_ty, is_edge_group, edge_id) for child in reversed(elem))
 
-    visit(root, 0.0, 0.0, False, "")
     return edges
 
 
 def svg_size(root):
-    view_box = root.attrib.get("viewBox", "")
+    view_box = root.get("viewBox", "")
     if view_box:
         parts = [p for p in view_box.replace(",", " ").split() if p]
         if len(parts) >= 4:
             return parse_svg_number(parts[2]), parse_svg_number(parts[3])
-    width_attr = root.attrib.get("width", "")
-    height_attr = root.attrib.get("height", "")
+    width_attr = root.get("width", "")
+    height_attr = root.get("height", "")
     width = parse_svg_number(width_attr)
     height = parse_svg_number(height_attr)
     if width <= 0.0 or height <= 0.0 or width_attr.strip().endswith("%") or height_attr.strip().endswith("%"):
-        style = root.attrib.get("style", "")
+        style = root.get("style", "")
         if style:
             for part in style.split(";"):
                 if ":" not in part:
@@ -596,7 +680,7 @@ def svg_size(root):
 
 
 def text_anchor(elem, style):
-    anchor = elem.attrib.get("text-anchor")
+    anchor = elem.get("text-anchor")
     if not anchor:
         anchor = style.get("text-anchor", "")
     anchor = anchor.strip().lower()
@@ -606,14 +690,14 @@ def text_anchor(elem, style):
 
 
 def text_font_size(elem, style):
-    size = parse_svg_number(elem.attrib.get("font-size", ""))
+    size = parse_svg_number(elem.get("font-size", ""))
     if size <= 0.0:
         size = parse_svg_number(style.get("font-size", ""))
     return size if size > 0.0 else 16.0
 
 
 def first_attr_number(elem, attr):
-    raw = elem.attrib.get(attr, "")
+    raw = elem.get(attr, "")
     if not raw:
         return None
     parts = [p for p in raw.replace(",", " ").split() if p]
@@ -638,40 +722,50 @@ def extract_text_lines(text_elem):
     return [raw] if raw else []
 
 
-def parse_text_boxes(svg_path: Path):
-    root = ET.fromstring(svg_path.read_text())
+def parse_text_boxes(svg_path: Path, root=None):
+    if root is None:
+        root = load_svg_root(svg_path)
     boxes = []
 
-    def visit(elem, acc_tx, acc_ty, inherited_edge_id):
+    # Iterative pre-order walk; children are pushed in reverse so they are
+    # still visited in document order.
+    stack = [(root, 0.0, 0.0, "")]
+    while stack:
+        elem, acc_tx, acc_ty, inherited_edge_id = stack.pop()
         tag = strip_ns(elem.tag)
         if tag in {"defs", "style", "script"}:
-            return
-        tx, ty = parse_transform(elem.attrib.get("transform", ""))
-        cur_tx = acc_tx + tx
-        cur_ty = acc_ty + ty
-        local_edge_id = elem.attrib.get("data-edge-id") or elem.attrib.get("data-id")
+            continue
+        transform = elem.get("transform")
+        if transform:
+            tx, ty = parse_transform(transform)
+            cur_tx = acc_tx + tx
+            cur_ty = acc_ty + ty
+        else:
+            cur_tx = acc_tx
+            cur_ty = acc_ty
+        local_edge_id = elem.get("data-edge-id") or elem.get("data-id")
         edge_id = local_edge_id or inherited_edge_id
 
         if tag == "foreignObject":
-            width = parse_svg_number(elem.attrib.get("width", ""))
-            height = parse_svg_number(elem.attrib.get("height", ""))
+            width = parse_svg_number(elem.get("width", ""))
+            height = parse_svg_number(elem.get("height", ""))
             if width > 0.0 and height > 0.0:
-                x = parse_svg_number(elem.attrib.get("x", "")) + cur_tx
-                y = parse_svg_number(elem.attrib.get("y", "")) + cur_ty
+                x = parse_svg_number(elem.get("x", "")) + cur_tx
+                y = parse_svg_number(elem.get("y", "")) + cur_ty
                 boxes.append(
                     {
                         "x": x,
                         "y": y,
                         "width": width,
                         "height": height,
-                        "class": elem.attrib.get("class", ""),
+                        "class": elem.get("class", ""),
                         "edge_id": edge_id or "",
                         "edge_id_norm": canonical_edge_id(edge_id),
                     }
                 )
 
         if tag == "text":
-            style = parse_style_map(elem.attrib.get("style", ""))
+            style = parse_style_map(elem.get("style", ""))
             lines = extract_text_lines(elem)
             if lines:
                 x = first_attr_number(elem, "x")
@@ -694,7 +788,7 @@ def parse_text_boxes(svg_path: Path):
                 y += cur_ty
                 font_size = text_font_size(elem, style)
                 line_height = font_size * 1.2
-                width = max(len(line) for line in lines) * font_size * 0.6
+                width = max(map(len, lines)) * font_size * 0.6
                 height = max(font_size, len(lines) * line_height)
                 anchor = text_anchor(elem, style)
                 if anchor == "middle":
@@ -709,47 +803,47 @@ def parse_text_boxes(svg_path: Path):
                         "y": y,
                         "width": width,
                         "height": height,
-                        "class": elem.attrib.get("class", ""),
+                        "class": elem.get("class", ""),
                         "edge_id": edge_id or "",
                         "edge_id_norm": canonical_edge_id(edge_id),
                     }
                 )
 
-        for child in list(elem):
-            visit(child, cur_tx, cur_ty, edge_id)
+        if len(elem):
+            stack.extend((child, cur_tx, cur_ty, edge_id) for child in reversed(elem))
 
-    visit(root, 0.0, 0.0, "")
     return boxes
 
 
-def parse_edge_label_boxes(svg_path: Path):
-    root = ET.fromstring(svg_path.read_text())
+def parse_edge_label_boxes(svg_path: Path, root=None):
+    if root is None:
+        root = load_svg_root(svg_path)
     boxes = []
 
     def looks_like_edge_label_rect(elem, in_edge_label_group):
         has_explicit_edge_id = bool(
-            (elem.attrib.get("data-edge-id") or elem.attrib.get("data-id") or "").strip()
+            (elem.get("data-edge-id") or elem.get("data-id") or "").strip()
         )
-        has_label_kind = bool((elem.attrib.get("data-label-kind") or "").strip())
+        has_label_kind = bool((elem.get("data-label-kind") or "").strip())
         # mmdr emits explicit metadata on edge-label rects; trust those attrs
         # even when visual background opacity is suppressed.
         if has_explicit_edge_id and has_label_kind:
             return True
         if in_edge_label_group:
             return True
-        h = parse_svg_number(elem.attrib.get("height", ""))
+        h = parse_svg_number(elem.get("height", ""))
         if h <= 0.0 or h > 140.0:
             return False
-        rx = parse_svg_number(elem.attrib.get("rx", ""))
+        rx = parse_svg_number(elem.get("rx", ""))
         if rx > 6.0:
             return False
-        style = parse_style_map(elem.attrib.get("style", ""))
-        fill = (elem.attrib.get("fill") or style.get("fill") or "").strip().lower()
+        style = parse_style_map(elem.get("style", ""))
+        fill = (elem.get("fill") or style.get("fill") or "").strip().lower()
         stroke_opacity = parse_svg_number(
-            elem.attrib.get("stroke-opacity", "") or style.get("stroke-opacity", "")
+            elem.get("stroke-opacity", "") or style.get("stroke-opacity", "")
         )
         stroke_width = parse_svg_number(
-            elem.attrib.get("stroke-width", "") or style.get("stroke-width", "")
+            elem.get("stroke-width", "") or style.get("stroke-width", "")
         )
         # mmdr edge-label boxes are translucent rounded rects with rgba fill.
         if (
@@ -762,33 +856,42 @@ def parse_edge_label_boxes(svg_path: Path):
             return False
         return fill in {"#fff", "#ffffff", "white", "rgb(255,255,255)"}
 
-    def visit(
-        elem,
-        acc_tx,
-        acc_ty,
-        in_edge_label_group,
-        inherited_edge_id,
-        inherited_label_kind,
-    ):
+    # Iterative pre-order walk; children are pushed in reverse so they are
+    # still visited in document order.
+    stack = [(root, 0.0, 0.0, False, "", "")]
+    while stack:
+        (
+            elem,
+            acc_tx,
+            acc_ty,
+            in_edge_label_group,
+            inherited_edge_id,
+            inherited_label_kind,
+        ) = stack.pop()
         tag = strip_ns(elem.tag)
         if tag in {"defs", "style", "script"}:
-            return
-        tx, ty = parse_transform(elem.attrib.get("transform", ""))
-        cur_tx = acc_tx + tx
-        cur_ty = acc_ty + ty
-        cls = elem.attrib.get("class", "").lower()
-        local_edge_id = elem.attrib.get("data-edge-id") or elem.attrib.get("data-id")
+            continue
+        transform = elem.get("transform")
+        if transform:
+            tx, ty = parse_transform(transform)
+            cur_tx = acc_tx + tx
+            cur_ty = acc_ty + ty
+        else:
+            cur_tx = acc_tx
+            cur_ty = acc_ty
+        cls = elem.get("class", "").lower()
+        local_edge_id = elem.get("data-edge-id") or elem.get("data-id")
         edge_id = local_edge_id or inherited_edge_id
-        local_label_kind = (elem.attrib.get("data-label-kind") or "").strip().lower()
+        local_label_kind = (elem.get("data-label-kind") or "").strip().lower()
         label_kind = local_label_kind or inherited_label_kind
         is_edge_label_group = in_edge_label_group or "edgelabel" in cls
 
         if tag == "foreignObject" and is_edge_label_group:
-            width = parse_svg_number(elem.attrib.get("width", ""))
-            height = parse_svg_number(elem.attrib.get("height", ""))
+            width = parse_svg_number(elem.get("width", ""))
+            height = parse_svg_number(elem.get("height", ""))
             if width > 0.0 and height > 0.0:
-                x = parse_svg_number(elem.attrib.get("x", "")) + cur_tx
-                y = parse_svg_number(elem.attrib.get("y", "")) + cur_ty
+                x = parse_svg_number(elem.get("x", "")) + cur_tx
+                y = parse_svg_number(elem.get("y", "")) + cur_ty
                 boxes.append(
                     {
                         "x": x,
@@ -801,11 +904,11 @@ def parse_edge_label_boxes(svg_path: Path):
                     }
                 )
         elif tag == "rect" and looks_like_edge_label_rect(elem, is_edge_label_group):
-            width = parse_svg_number(elem.attrib.get("width", ""))
-            height = parse_svg_number(elem.attrib.get("height", ""))
+            width = parse_svg_number(elem.get("width", ""))
+            height = parse_svg_number(elem.get("height", ""))
             if width > 0.0 and height > 0.0:
-                x = parse_svg_number(elem.attrib.get("x", "")) + cur_tx
-                y = parse_svg_number(elem.attrib.get("y", "")) + cur_ty
+                x = parse_svg_number(elem.get("x", "")) + cur_tx
+                y = parse_svg_number(elem.get("y", "")) + cur_ty
                 boxes.append(
                     {
                         "x": x,
@@ -818,10 +921,12 @@ def parse_edge_label_boxes(svg_path: Path):
                     }
                 )
 
-        for child in list(elem):
-            visit(child, cur_tx, cur_ty, is_edge_label_group, edge_id, label_kind)
+        if len(elem):
+            stack.extend(
+                (child, cur_tx, cur_ty, is_edge_label_group, edge_id, label_kind)
+                for child in reversed(elem)
+            )
 
-    visit(root, 0.0, 0.0, False, "", "")
     return boxes
 
 
@@ -1034,53 +1139,123 @@ def polyline_rect_gap(points, rect):
     return best
 
 
-def collinear_overlap_length(a, b, c, d, eps=1e-6):
-    if abs(orient(a, b, c)) > eps or abs(orient(a, b, d)) > eps:
-        return 0.0
-    dx = b[0] - a[0]
-    dy = b[1] - a[1]
-    seg_len_sq = dx * dx + dy * dy
-    if seg_len_sq < eps:
-        return 0.0
-
-    def proj(p):
-        return ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / seg_len_sq
-
-    t1 = proj(c)
-    t2 = proj(d)
-    tmin = min(t1, t2)
-    tmax = max(t1, t2)
-    overlap = max(0.0, min(1.0, tmax) - max(0.0, tmin))
-    return overlap * math.sqrt(seg_len_sq)
+def sweep_segment_pairs(segments, pad=1e-2):
+    # For each (edge index, ax, ay, bx, by) segment i, the ascending indices
+    # j > i whose bbox overlaps it once both are widened by pad (touching
+    # counts). A sort-and-sweep over x keeps the segments whose x-range is
+    # still open, as layout_score.sweep_box_pairs does. Segments with a
+    # non-finite coordinate cannot be ordered and are paired with every other
+    # segment.
+    isfinite = math.isfinite
+    spans = []
+    unordered = []
+    for idx, (_, ax, ay, bx, by) in enumerate(segments):
+        if not (isfinite(ax) and isfinite(ay) and isfinite(bx) and isfinite(by)):
+            unordered.append(idx)
+            continue
+        spans.append((min(ax, bx) - pad, max(ax, bx) + pad, min(ay, by) - pad, max(ay, by) + pad, idx))
+    spans.sort()
+    candidates = [[] for _ in segments]
+    active = []
+    for lo, hi, ylo, yhi, idx in spans:
+        active = [item for item in active if item[0] >= lo]
+        for _, other_ylo, other_yhi, other in active:
+            if other_ylo <= yhi and ylo <= other_yhi:
+                if other < idx:
+                    candidates[other].append(idx)
+                else:
+                    candidates[idx].append(other)
+        active.append((hi, ylo, yhi, idx))
+    unordered_set = set(unordered)
+    for idx in unordered:
+        for other in range(len(segments)):
+            if other == idx or (other in unordered_set and other < idx):
+                continue
+            candidates[min(idx, other)].append(max(idx, other))
+    for pairs in candidates:
+        pairs.sort()
+    return candidates
 
 
 def compute_svg_edge_path_metrics(edges):
+    # Segments are flattened to (edge index, ax, ay, bx, by) and the pair loop
+    # inlines segments_intersect and the collinear-overlap length, sharing the
+    # two orientation terms both tests need.
     segments = []
     for idx, edge in enumerate(edges):
         points = [tuple(p) for p in edge.get("points", [])]
         if len(points) < 2:
             continue
         for a, b in zip(points, points[1:]):
-            segments.append((idx, a, b))
+            segments.append((idx, a[0], a[1], b[0], b[1]))
 
+    eps = 1e-6
+    hypot = math.hypot
     crossings = 0
     overlap_length = 0.0
-    for i in range(len(segments)):
-        ei, a1, a2 = segments[i]
-        for j in range(i + 1, len(segments)):
-            ej, b1, b2 = segments[j]
+    # Only pairs whose bboxes come within 1e-2 can cross or overlap: a
+    # collinear match needs both endpoints within eps / |ab| <= sqrt(eps) =
+    # 1e-3 of the other line, and shorter segments are ignored. Candidates
+    # come back ascending, so the overlap length sums in the original order.
+    pair_candidates = sweep_segment_pairs(segments)
+    for i, (ei, ax, ay, bx, by) in enumerate(segments):
+        abx = bx - ax
+        aby = by - ay
+        for j in pair_candidates[i]:
+            ej, cx, cy, dx, dy = segments[j]
             if ei == ej:
                 continue
-            if (
-                math.hypot(a1[0] - b1[0], a1[1] - b1[1]) < 1e-6
-                or math.hypot(a1[0] - b2[0], a1[1] - b2[1]) < 1e-6
-                or math.hypot(a2[0] - b1[0], a2[1] - b1[1]) < 1e-6
-                or math.hypot(a2[0] - b2[0], a2[1] - b2[1]) < 1e-6
-            ):
+            # Skip pairs sharing an endpoint; hypot() is only reached when both
+            # deltas are already within the tolerance.
+            ex = ax - cx
+            ey = ay - cy
+            if -eps < ex < eps and -eps < ey < eps and hypot(ex, ey) < eps:
+                continue
+            ex = ax - dx
+            ey = ay - dy
+            if -eps < ex < eps and -eps < ey < eps and hypot(ex, ey) < eps:
+                continue
+            ex = bx - cx
+            ey = by - cy
+            if -eps < ex < eps and -eps < ey < eps and hypot(ex, ey) < eps:
+                continue
+            ex = bx - dx
+            ey = by - dy
+            if -eps < ex < eps and -eps < ey < eps and hypot(ex, ey) < eps:
                 continue
-            if segments_intersect(a1, a2, b1, b2):
+
+            cdx = dx - cx
+            cdy = dy - cy
+            o1 = abx * (cy - ay) - aby * (cx - ax)
+            o2 = abx * (dy - ay) - aby * (dx - ax)
+            o3 = cdx * (ay - cy) - cdy * (ax - cx)
+            o4 = cdx * (by - cy) - cdy * (bx - cx)
+            near1 = -eps < o1 < eps
+            near2 = -eps < o2 < eps
+            near3 = -eps < o3 < eps
+            near4 = -eps < o4 < eps
+            if not (near1 and near2 and near3 and near4) and (
+                (o1 * o2 < 0 and o3 * o4 < 0)
+                or (near1 and on_segment((ax, ay), (bx, by), (cx, cy), eps))
+                or (near2 and on_segment((ax, ay), (bx, by), (dx, dy), eps))
+                or (near3 and on_segment((cx, cy), (dx, dy), (ax, ay), eps))
+                or (near4 and on_segment((cx, cy), (dx, dy), (bx, by), eps))
+            ):
                 crossings += 1
-            overlap_length += collinear_overlap_length(a1, a2, b1, b2)
+
+            # The collinear overlap contributes nothing unless both of the
+            # second segment's endpoints lie on the first segment's line.
+            if o1 > eps or o1 < -eps or o2 > eps or o2 < -eps:
+                continue
+            seg_len_sq = abx * abx + aby * aby
+            if seg_len_sq < eps:
+                continue
+            t1 = ((cx - ax) * abx + (cy - ay) * aby) / seg_len_sq
+            t2 = ((dx - ax) * abx + (dy - ay) * aby) / seg_len_sq
+            tmin = min(t1, t2)
+            tmax = max(t1, t2)
+            overlap = max(0.0, min(1.0, tmax) - max(0.0, tmin))
+            overlap_length += overlap * math.sqrt(seg_len_sq)
 
     return {
         "svg_edge_crossings": crossings,
@@ -1121,9 +1296,10 @@ def compute_label_metrics(
     # differences across hosts; they are visually negligible but can create
     # unstable count deltas in cross-machine benchmark runs.
     min_overlap_area = 10.0
-    labels = parse_text_boxes(svg_path)
-    explicit_edge_label_boxes = parse_edge_label_boxes(svg_path)
-    root = ET.fromstring(svg_path.read_text())
+    # Parse the SVG once and hand the (read-only) tree to both walkers.
+    root = load_svg_root(svg_path)
+    labels = parse_text_boxes(svg_path, root)
+    explicit_edge_label_boxes = parse_edge_label_boxes(svg_path, root)
     canvas_width, canvas_height = svg_size(root)
     canvas_rect = {
         "x": 0.0,
@@ -1564,9 +1740,9 @@ def match_endpoint(point, node_list):
 def load_mermaid_svg_graph(svg_path: Path):
     layout_diff = load_layout_diff()
     nodes, _, _, _ = layout_diff.parse_mermaid_svg(svg_path)
-    root = ET.fromstring(svg_path.read_text())
+    root = load_svg_root(svg_path)
     width, height = svg_size(root)
-    edge_paths = parse_mermaid_edges(svg_path)
+    edge_paths = parse_mermaid_edges(svg_path, root)
     node_list = []
     for node_id, node in nodes.items():
         cx = node["x"] + node["width"] / 2.0
@@ -1670,10 +1846,14 @@ def mmdc_cli_identity(cli_cmd: str) -> str:
 
 def file_digest(path: Path) -> str:
     try:
-        data = path.read_bytes()
+        with path.open("rb") as handle:
+            # hashlib.file_digest (Python 3.11+) hashes in fixed-size chunks
+            # instead of reading the whole file into memory first.
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(handle, "sha256").hexdigest()
+            return hashlib.sha256(handle.read()).hexdigest()
     except OSError:
         return ""
-    return hashlib.sha256(data).hexdigest()
 
 
 def mmdc_metrics_script_digest() -> str:
@@ -2238,8 +2418,9 @@ def compute_sequence_cli_conformance(layout_path: Path, mermaid_svg_path: Path):
     mmdr_nodes, _ = layout_diff.load_mmdr_layout(layout_path)
     mer_nodes, mer_labels, _, mer_specials = layout_diff.parse_mermaid_svg(mermaid_svg_path)
     diffs, missing = layout_diff.compute_diffs(mmdr_nodes, mer_nodes, mer_labels, mer_specials)
-    summary = layout_diff.summarize_diffs(diffs)
-    _, _, aligned_summary, _ = layout_diff.align_diffs(diffs)
+    totals = layout_diff.accumulate_diffs(diffs)
+    summary = layout_diff.summarize_diffs(diffs, totals)
+    _, _, aligned_summary, _ = layout_diff.align_diffs(diffs, totals)
     return {
         "sequence_cli_match_count": summary.get("count", 0),
         "sequence_cli_missing_nodes": len(missing),